@@ -6,8 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import JSONResponse, RedirectResponse
 from starlette.middleware.sessions import SessionMiddleware
 
-from app.core.auth import oauth
-from app.core.config import settings
+from app.core.auth import get_oauth, oauth_configured
 
 
 router = APIRouter()
@@ -28,21 +27,21 @@ async def me(request: Request) -> Dict[str, Any]:
 
 @router.get("/login/google")
 async def login_google(request: Request):
-    if not settings.google_client_id or not settings.google_client_secret:
+    if not oauth_configured():
         raise HTTPException(status_code=500, detail="Google OAuth not configured")
     redirect_uri = request.url_for("auth_google_callback")
-    return await oauth.google.authorize_redirect(request, str(redirect_uri))
+    return await get_oauth().google.authorize_redirect(request, str(redirect_uri))
 
 
 @router.get("/auth/google/callback")
 async def auth_google_callback(request: Request):
-    if not settings.google_client_id or not settings.google_client_secret:
+    if not oauth_configured():
         raise HTTPException(status_code=500, detail="Google OAuth not configured")
-    token = await oauth.google.authorize_access_token(request)
+    token = await get_oauth().google.authorize_access_token(request)
     userinfo = token.get("userinfo")
     if not userinfo:
         # Fallback: fetch from userinfo endpoint
-        resp = await oauth.google.get("userinfo", token=token)
+        resp = await get_oauth().google.get("userinfo", token=token)
         userinfo = resp.json()
     if not userinfo:
         raise HTTPException(status_code=401, detail="Failed to retrieve user info")
@@ -1,74 +1,658 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+from typing import AsyncIterator, List, Union
+
 from fastapi import APIRouter
-from fastapi import UploadFile, File, Form, HTTPException, Request
-from fastapi.responses import StreamingResponse
+from fastapi import UploadFile, File, Form, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 
-from app.core.llm import adapt_resume
-from app.core.pdf import extract_first_two_pages_text, parse_text_to_sections, render_cv_pdf_from_sections
-from app.models.schemas import AdaptRequest, AdaptResponse, HealthResponse
+from app.core.cache import result_cache
+from app.core.config import settings
+from app.core.executor import WorkerCrashedError, WorkerTimeoutError, run_blocking, run_cpu_bound
+from app.core.jobs import PRIORITY_ANONYMOUS, PRIORITY_AUTHENTICATED, SUCCEEDED, Job, job_queue
+from app.core.llm import Adaptation, adapt_resume, inflight, is_authenticated, stream_adapt_resume
+from app.core.metrics import registry as metrics_registry, stage
+from app.core.singleflight import SingleFlight
+from app.core.pdf import (
+    ExtractedText,
+    ParsedSection,
+    cache_section,
+    extract_pdf_text,
+    get_cached_section,
+    get_theme,
+    parse_text_to_sections,
+    pdf_render_cache,
+    pdf_render_key,
+    pdf_text_cache,
+    render_cv_pdf_from_sections,
+    strip_page_breaks,
+)
+from app.models.schemas import (
+    AdaptRequest,
+    AdaptResponse,
+    BatchAdaptRequest,
+    BatchItemResult,
+    ExtractResponse,
+    HealthResponse,
+    JobRequest,
+    JobStatus,
+    SectionsPdfRequest,
+)
 
 
 router = APIRouter()
 
+# Identical PDFs requested at the same time are rendered once
+render_inflight = SingleFlight()
+
 
 @router.get("/healthz", response_model=HealthResponse)
 def healthcheck() -> HealthResponse:
     return HealthResponse(status="ok")
 
 
+@router.get("/cache/stats")
+async def cache_stats() -> dict:
+    if result_cache is None:
+        stats = {"backend": "none", "hits": 0, "misses": 0, "size": 0}
+    else:
+        stats = await result_cache.stats()
+    stats["coalesced"] = inflight.coalesced
+    stats["in_flight"] = inflight.in_flight()
+    return stats
+
+
+metrics_registry.callback(
+    "cv_adapter_pdf_text_cache_lookups_total",
+    "Extracted-text cache lookups by result",
+    ("result",),
+    lambda: [(("hit",), pdf_text_cache.hits), (("miss",), pdf_text_cache.misses)],
+    kind="counter",
+)
+metrics_registry.callback(
+    "cv_adapter_pdf_text_cache_bytes",
+    "Size of the extracted-text cache",
+    (),
+    lambda: [((), pdf_text_cache.total_bytes)],
+)
+metrics_registry.callback(
+    "cv_adapter_pdf_render_cache_lookups_total",
+    "Rendered-PDF cache lookups by result",
+    ("result",),
+    lambda: [(("hit",), pdf_render_cache.hits), (("miss",), pdf_render_cache.misses)],
+    kind="counter",
+)
+PDF_PAGE_SECONDS = metrics_registry.histogram(
+    "cv_adapter_pdf_page_extract_seconds",
+    "Text extraction time per PDF page",
+)
+
+
+PDF_CONTENT_TYPES = ("application/pdf", "application/x-pdf", "application/acrobat", "applications/pdf", "text/pdf", "text/x-pdf")
+
+
+def _ensure_pdf(file: UploadFile) -> None:
+    if file.content_type not in PDF_CONTENT_TYPES:
+        raise HTTPException(status_code=400, detail="Only PDF files are supported")
+
+
+_UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+
+class PdfUpload:
+    """An uploaded PDF, hashed while it is read.
+
+    Small files stay in memory; larger ones are spooled to a temp file so the
+    extraction worker can memory-map the file instead of receiving a pickled copy.
+    """
+
+    def __init__(self) -> None:
+        self.handle = ""
+        self.data: bytes | None = None
+        self.path: str | None = None
+
+    @property
+    def source(self) -> bytes | str:
+        return self.path if self.path is not None else (self.data or b"")
+
+    def close(self) -> None:
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+
+async def _read_pdf_upload(file: UploadFile) -> PdfUpload:
+    _ensure_pdf(file)
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"PDF exceeds the upload limit of {settings.pdf_max_upload_bytes} bytes",
+    )
+    if file.size is not None and file.size > settings.pdf_max_upload_bytes:
+        raise too_large
+
+    upload = PdfUpload()
+    digest = hashlib.sha256()
+    chunks: List[bytes] = []
+    size = 0
+    spool = None
+    try:
+        while chunk := await file.read(_UPLOAD_CHUNK_BYTES):
+            size += len(chunk)
+            if size > settings.pdf_max_upload_bytes:
+                raise too_large
+            digest.update(chunk)
+            if spool is None and size > settings.pdf_spool_threshold_bytes:
+                spool = tempfile.NamedTemporaryFile(prefix="cv-upload-", suffix=".pdf", delete=False)
+                upload.path = spool.name
+                await run_blocking(spool.writelines, chunks)
+                chunks = []
+            if spool is not None:
+                await run_blocking(spool.write, chunk)
+            else:
+                chunks.append(chunk)
+    except BaseException:
+        upload.close()
+        raise
+    finally:
+        if spool is not None:
+            spool.close()
+
+    if upload.path is None:
+        upload.data = b"".join(chunks)
+    # Same value as pdf_handle(), without holding the whole file to compute it
+    upload.handle = digest.hexdigest()
+    return upload
+
+
+async def _extract_resume_text(upload: PdfUpload) -> tuple[str, str, ExtractedText | None]:
+    """Return (handle, text, extraction details) for an uploaded PDF, parsing it only on a cache miss.
+
+    Extraction details are None on a cache hit. The upload is released either way.
+    """
+    try:
+        handle = upload.handle
+        resume_text = pdf_text_cache.get(handle)
+        if resume_text is not None:
+            return handle, resume_text, None
+
+        try:
+            with stage("extract"):
+                extracted = await run_cpu_bound(
+                    extract_pdf_text,
+                    upload.source,
+                    max_pages=settings.pdf_extract_max_pages,
+                    max_chars=settings.pdf_extract_max_chars,
+                )
+        except WorkerTimeoutError as exc:
+            raise HTTPException(status_code=504, detail=f"PDF extraction timed out: {exc}")
+        except WorkerCrashedError as exc:
+            # Not necessarily this upload's fault: a worker crash fails every job in its pool
+            raise HTTPException(status_code=503, detail=f"PDF extraction failed: {exc}", headers={"Retry-After": "1"})
+        except Exception as exc:
+            raise HTTPException(status_code=400, detail=f"Failed to read PDF: {exc}")
+    finally:
+        upload.close()
+
+    for page_ms in extracted.page_timings_ms:
+        PDF_PAGE_SECONDS.observe(page_ms / 1000)
+    resume_text = extracted.text
+    if not resume_text.strip():
+        raise HTTPException(status_code=400, detail="No extractable text found in the PDF")
+
+    pdf_text_cache.set(handle, resume_text)
+    return handle, resume_text, extracted
+
+
+def _resume_text_from_handle(handle: str) -> str:
+    resume_text = pdf_text_cache.get(handle)
+    if resume_text is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired resume handle; upload the PDF again")
+    return resume_text
+
+
+def _resolve_resume_text(payload: AdaptRequest) -> str:
+    if payload.resume_text is not None:
+        return payload.resume_text
+    return _resume_text_from_handle(payload.resume_handle or "")
+
+
+@router.post("/extract", response_model=ExtractResponse, response_model_exclude_none=True)
+async def extract(file: UploadFile = File(..., description="PDF resume file")) -> ExtractResponse:
+    """Extract resume text once and return a handle usable as `resume_handle` in adapt calls."""
+    handle, resume_text, extracted = await _extract_resume_text(await _read_pdf_upload(file))
+    resume_text = strip_page_breaks(resume_text)
+    if extracted is None:
+        return ExtractResponse(handle=handle, resume_text=resume_text)
+    return ExtractResponse(
+        handle=handle,
+        resume_text=resume_text,
+        page_count=extracted.page_count,
+        pages_read=extracted.pages_read,
+        page_timings_ms=extracted.page_timings_ms,
+        truncated=extracted.truncated,
+    )
+
+
 @router.post("/adapt", response_model=AdaptResponse)
-def adapt(payload: AdaptRequest, req: Request) -> AdaptResponse:
-    adapted = adapt_resume(
-        resume_text=payload.resume_text,
+async def adapt(payload: AdaptRequest, req: Request, response: Response) -> AdaptResponse:
+    adapted = await adapt_resume(
+        resume_text=_resolve_resume_text(payload),
         job_description=payload.job_description,
         strategy=payload.strategy,
         request=req,
+        split_sections=payload.split_sections,
+        consistency_pass=payload.consistency_pass,
+        output_format=payload.output_format,
+    )
+    response.headers["X-Model"] = adapted.model
+    return AdaptResponse(adapted_resume=adapted.text, sections=adapted.sections, model=adapted.model)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/adapt/stream")
+async def adapt_stream(payload: AdaptRequest, req: Request) -> StreamingResponse:
+    """Server-Sent Events variant of /adapt: emits `delta` events, then `done` (with the model) or `error`."""
+
+    resume_text = _resolve_resume_text(payload)
+
+    async def events():
+        served = {}
+        stream = stream_adapt_resume(
+            resume_text=resume_text,
+            job_description=payload.job_description,
+            strategy=payload.strategy,
+            request=req,
+            on_model=lambda model: served.update(model=model),
+        )
+        try:
+            async for delta in stream:
+                if await req.is_disconnected():
+                    # Client went away: stop reading so the upstream request is cancelled
+                    return
+                yield _sse("delta", {"text": delta})
+            yield _sse("done", served)
+        except Exception as exc:
+            yield _sse("error", {"detail": str(exc)})
+        finally:
+            await stream.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    return AdaptResponse(adapted_resume=adapted)
+
+
+async def _batch_results(
+    resumes: List[str],
+    job_descriptions: List[str],
+    strategy: str | None,
+    request: Request,
+) -> AsyncIterator[str]:
+    """Adapt every resume/job pair with bounded concurrency, yielding NDJSON lines as items finish."""
+    pairs = [(ri, ji) for ri in range(len(resumes)) for ji in range(len(job_descriptions))]
+    semaphore = asyncio.Semaphore(settings.batch_concurrency)
+
+    async def run_one(index: int, resume_index: int, job_index: int) -> BatchItemResult:
+        result = BatchItemResult(index=index, resume_index=resume_index, job_index=job_index)
+        async with semaphore:
+            try:
+                adapted = await adapt_resume(
+                    resume_text=resumes[resume_index],
+                    job_description=job_descriptions[job_index],
+                    strategy=strategy,
+                    request=request,
+                )
+                result.adapted_resume, result.model = adapted.text, adapted.model
+            except Exception as exc:
+                # One failing item must not fail the whole batch
+                result.error = str(exc) or exc.__class__.__name__
+        return result
+
+    tasks = [asyncio.create_task(run_one(i, ri, ji)) for i, (ri, ji) in enumerate(pairs)]
+    failed = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            failed += result.error is not None
+            yield result.model_dump_json(exclude_none=True) + "\n"
+        yield json.dumps({"done": True, "total": len(tasks), "failed": failed}) + "\n"
+    finally:
+        # Client disconnected (or the stream was closed early): stop the remaining work
+        for task in tasks:
+            task.cancel()
+
+
+def _batch_response(resumes: List[str], job_descriptions: List[str], strategy: str | None, request: Request) -> StreamingResponse:
+    total = len(resumes) * len(job_descriptions)
+    if total > settings.batch_max_items:
+        raise HTTPException(status_code=400, detail=f"Batch has {total} items; the limit is {settings.batch_max_items}")
+    return StreamingResponse(
+        _batch_results(resumes, job_descriptions, strategy, request),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/adapt/batch")
+async def adapt_batch(payload: BatchAdaptRequest, req: Request) -> StreamingResponse:
+    """Adapt one resume to many job descriptions (or many resumes to one), streamed as NDJSON."""
+    if payload.resume_texts is not None:
+        resumes = payload.resume_texts
+    elif payload.resume_text is not None:
+        resumes = [payload.resume_text]
+    else:
+        resumes = [_resume_text_from_handle(payload.resume_handle or "")]
+    return _batch_response(resumes, payload.job_descriptions, payload.strategy, req)
+
+
+@router.post("/adapt/batch-upload")
+async def adapt_batch_upload(
+    request: Request,
+    file: UploadFile = File(..., description="PDF resume file"),
+    job_descriptions: List[str] = Form(..., description="Target job descriptions (repeat the field)"),
+    strategy: str | None = Form(default=None, description="Optional strategy hint"),
+) -> StreamingResponse:
+    _, resume_text, _ = await _extract_resume_text(await _read_pdf_upload(file))
+    return _batch_response([resume_text], job_descriptions, strategy, request)
 
 
 @router.post("/adapt-upload", response_model=AdaptResponse)
 async def adapt_upload(
     request: Request,
-    file: UploadFile = File(..., description="PDF resume file"),
+    response: Response,
+    file: UploadFile | None = File(default=None, description="PDF resume file"),
     job_description: str = Form(..., description="Target job description text"),
     strategy: str | None = Form(default=None, description="Optional strategy hint"),
+    resume_handle: str | None = Form(default=None, description="Handle from /extract, instead of re-uploading the file"),
+    split_sections: bool | None = Form(default=None, description="Adapt each resume section in parallel and merge them"),
+    consistency_pass: bool | None = Form(default=None, description="With split_sections, run a final consistency pass"),
+    output_format: str | None = Form(default=None, description="'text' or 'json' (structured sections)"),
 ) -> AdaptResponse:
-    if file.content_type not in ("application/pdf", "application/x-pdf", "application/acrobat", "applications/pdf", "text/pdf", "text/x-pdf"):
-        raise HTTPException(status_code=400, detail="Only PDF files are supported")
-
-    file_bytes = await file.read()
-    try:
-        resume_text = extract_first_two_pages_text(file_bytes)
-    except Exception as exc:
-        raise HTTPException(status_code=400, detail=f"Failed to read PDF: {exc}")
-
-    if not resume_text.strip():
-        raise HTTPException(status_code=400, detail="No extractable text found in the first two pages of the PDF")
+    if file is not None:
+        _, resume_text, _ = await _extract_resume_text(await _read_pdf_upload(file))
+    elif resume_handle:
+        resume_text = _resume_text_from_handle(resume_handle)
+    else:
+        raise HTTPException(status_code=400, detail="Either a PDF file or resume_handle is required")
 
-    adapted = adapt_resume(
+    adapted = await adapt_resume(
         resume_text=resume_text,
         job_description=job_description,
         strategy=strategy,
         request=request,
+        split_sections=split_sections,
+        consistency_pass=consistency_pass,
+        output_format=_output_format(output_format),
     )
-    return AdaptResponse(adapted_resume=adapted)
+    response.headers["X-Model"] = adapted.model
+    return AdaptResponse(adapted_resume=adapted.text, sections=adapted.sections, model=adapted.model)
 
 
-@router.post("/pdf")
-async def generate_pdf(
-    text: str = Form(..., description="Adapted resume text to render to PDF"),
-    filename: str | None = Form(default=None, description="Optional file name (without extension)"),
-    title: str | None = Form(default=None, description="Optional document title"),
-):
+def _output_format(output_format: str | None) -> str | None:
+    if output_format is not None and output_format not in ("text", "json"):
+        raise HTTPException(status_code=400, detail="output_format must be 'text' or 'json'")
+    return output_format
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as If-None-Match requires
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def _check_pdf_text(text: str) -> None:
     if not text.strip():
         raise HTTPException(status_code=400, detail="Text is required")
-    sections = parse_text_to_sections(text)
-    pdf_bytes = render_cv_pdf_from_sections(sections, title=title or "Curriculum Vitae")
+    if len(text) > settings.pdf_max_text_chars:
+        raise HTTPException(status_code=413, detail=f"Text is longer than {settings.pdf_max_text_chars} characters")
+
+
+def _theme_name(theme: str | None) -> str:
+    try:
+        return get_theme(theme).name
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+async def _render_pdf(key: str, content: Union[str, List[ParsedSection]], title: str, theme_name: str) -> bytes:
+    pdf_bytes = pdf_render_cache.get(key)
+    if pdf_bytes is not None:
+        return pdf_bytes
+
+    async def render() -> bytes:
+        if isinstance(content, str):
+            with stage("parse"):
+                sections = parse_text_to_sections(content)
+        else:
+            sections = content
+        with stage("render"):
+            rendered = await run_cpu_bound(render_cv_pdf_from_sections, sections, title=title, theme=theme_name)
+        pdf_render_cache.set(key, rendered)
+        return rendered
+
+    try:
+        return await render_inflight.do(key, render)
+    except WorkerTimeoutError as exc:
+        raise HTTPException(status_code=504, detail=f"PDF rendering timed out: {exc}")
+    except WorkerCrashedError as exc:
+        raise HTTPException(status_code=503, detail=f"PDF rendering failed: {exc}", headers={"Retry-After": "1"})
+
+
+async def _pdf_response(
+    request: Request,
+    content: Union[str, List[ParsedSection]],
+    title: str,
+    theme_name: str,
+    filename: str | None,
+) -> Response:
+    """Render (or reuse) a PDF of resume text or structured sections, answering 304 when the client already has this exact output.
+
+    The ETag is derived from the render inputs, so a matching If-None-Match is
+    answered without rendering or even touching the cache.
+    """
+    key = pdf_render_key(content, title, theme_name)
+    # Weak: a re-render of the same inputs is equivalent but not byte-identical (timestamps)
+    etag = f'W/"{key}"'
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    pdf_bytes = await _render_pdf(key, content, title, theme_name)
     out_name = (filename or "adapted-cv").strip() or "adapted-cv"
-    return StreamingResponse(
-        iter([pdf_bytes]),
+    # A plain Response sends the bytes in one body with Content-Length, no extra copy or chunking
+    return Response(
+        content=pdf_bytes,
         media_type="application/pdf",
         headers={
             "Content-Disposition": f"attachment; filename={out_name}.pdf",
+            "ETag": etag,
         },
-    ) 
\ No newline at end of file
+    )
+
+
+@router.post("/pdf")
+async def generate_pdf(
+    request: Request,
+    text: str = Form(..., description="Adapted resume text to render to PDF"),
+    filename: str | None = Form(default=None, description="Optional file name (without extension)"),
+    title: str | None = Form(default=None, description="Optional document title"),
+    theme: str | None = Form(default=None, description="Optional PDF theme (classic, modern, compact)"),
+) -> Response:
+    _check_pdf_text(text)
+    theme_name = _theme_name(theme)
+    return await _pdf_response(request, text, title or "Curriculum Vitae", theme_name, filename)
+
+
+@router.post("/pdf/sections")
+async def generate_pdf_from_sections(payload: SectionsPdfRequest, request: Request) -> Response:
+    """Render structured sections (e.g. from output_format "json") without parsing any text.
+
+    Sections the server has seen can be sent as just their id, so after an edit
+    only the changed sections need to be sent (and validated) again.
+    """
+    theme_name = _theme_name(payload.theme)
+    sections: List[ParsedSection] = []
+    for section in payload.sections:
+        if section.blocks is None:
+            cached = get_cached_section(section.id or "")
+            if cached is None:
+                raise HTTPException(status_code=404, detail=f"Unknown or expired section id {section.id!r}; send its blocks again")
+            sections.append(cached)
+        else:
+            sections.append(cache_section([block.model_dump() for block in section.blocks]))
+    size = sum(len(block["text"]) + sum(len(item) for item in block["items"]) for section in sections for block in section["blocks"])
+    if size > settings.pdf_max_text_chars:
+        raise HTTPException(status_code=413, detail=f"Text is longer than {settings.pdf_max_text_chars} characters")
+    return await _pdf_response(request, sections, payload.title or "Curriculum Vitae", theme_name, payload.filename)
+
+
+@router.post("/adapt-pdf")
+async def adapt_pdf(
+    request: Request,
+    file: UploadFile | None = File(default=None, description="PDF resume file"),
+    resume_handle: str | None = Form(default=None, description="Handle from /extract, instead of uploading a file"),
+    resume_text: str | None = Form(default=None, description="Resume text, instead of a file or handle"),
+    job_description: str = Form(..., description="Target job description text"),
+    strategy: str | None = Form(default=None, description="Optional strategy hint"),
+    split_sections: bool | None = Form(default=None, description="Adapt each resume section in parallel and merge them"),
+    consistency_pass: bool | None = Form(default=None, description="With split_sections, run a final consistency pass"),
+    output_format: str | None = Form(default=None, description="'text' or 'json' (structured sections)"),
+    filename: str | None = Form(default=None, description="Optional file name (without extension)"),
+    title: str | None = Form(default=None, description="Optional document title"),
+    theme: str | None = Form(default=None, description="Optional PDF theme (classic, modern, compact)"),
+) -> Response:
+    """Adapt a resume and return it rendered as a PDF, without round-tripping the text through the client."""
+    # Reject a bad theme before paying for the LLM call
+    theme_name = _theme_name(theme)
+    if file is not None:
+        _, resume_text, _ = await _extract_resume_text(await _read_pdf_upload(file))
+    elif resume_handle:
+        resume_text = _resume_text_from_handle(resume_handle)
+    elif not resume_text:
+        raise HTTPException(status_code=400, detail="A PDF file, resume_handle or resume_text is required")
+
+    adapted = await adapt_resume(
+        resume_text=resume_text,
+        job_description=job_description,
+        strategy=strategy,
+        request=request,
+        split_sections=split_sections,
+        consistency_pass=consistency_pass,
+        output_format=_output_format(output_format),
+    )
+    _check_pdf_text(adapted.text)
+    # Structured output is rendered as validated, without parsing the text again
+    response = await _pdf_response(request, adapted.sections or adapted.text, title or "Curriculum Vitae", theme_name, filename)
+    response.headers["X-Model"] = adapted.model
+    return response
+
+
+def _job_owner(request: Request) -> tuple[str, bool]:
+    """Quota key and whether the submitter is signed in (which also selects priority and model tier)."""
+    authenticated = is_authenticated(request)
+    sub = (request.session.get("user") or {}).get("sub") if authenticated else None
+    if sub:
+        return f"user:{sub}", authenticated
+    # Anonymous users share a quota per client address
+    return f"ip:{request.client.host if request.client else 'unknown'}", authenticated
+
+
+def _get_job(job_id: str, request: Request) -> Job:
+    job = job_queue.get(job_id)
+    # Someone else's job is reported as unknown, so its existence isn't confirmed either
+    if job is None or job.owner != _job_owner(request)[0]:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job
+
+
+def _job_status(request: Request, job: Job) -> JobStatus:
+    succeeded = job.status == SUCCEEDED
+    return JobStatus(
+        id=job.id,
+        status=job.status,
+        position=job_queue.position(job),
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        adapted_resume=job.result.text if succeeded else None,
+        sections=job.result.sections if succeeded else None,
+        model=job.result.model if succeeded else None,
+        pdf_url=request.url_for("get_job_pdf", job_id=job.id).path if succeeded and job.meta.get("theme") else None,
+        error=job.error,
+    )
+
+
+@router.post("/jobs", response_model=JobStatus, response_model_exclude_none=True, status_code=202)
+async def submit_job(payload: JobRequest, request: Request, response: Response) -> JobStatus:
+    """Queue an adaptation and return at once; poll GET /jobs/{id} (optionally with ?wait=) for the result."""
+    resume_text = _resolve_resume_text(payload)
+    theme_name = _theme_name(payload.theme) if payload.render_pdf else None
+    title = payload.title or "Curriculum Vitae"
+    owner, authenticated = _job_owner(request)
+
+    async def work() -> Adaptation:
+        adapted = await adapt_resume(
+            resume_text=resume_text,
+            job_description=payload.job_description,
+            strategy=payload.strategy,
+            split_sections=payload.split_sections,
+            consistency_pass=payload.consistency_pass,
+            authenticated=authenticated,
+            output_format=payload.output_format,
+        )
+        if theme_name is not None:
+            _check_pdf_text(adapted.text)
+            # Rendered into the render cache, so the download is served without waiting
+            content = adapted.sections or adapted.text
+            await _render_pdf(pdf_render_key(content, title, theme_name), content, title, theme_name)
+        return adapted
+
+    job = await job_queue.submit(
+        owner,
+        PRIORITY_AUTHENTICATED if authenticated else PRIORITY_ANONYMOUS,
+        work,
+        meta={"title": title, "theme": theme_name, "filename": payload.filename},
+    )
+    response.headers["Location"] = request.url_for("get_job", job_id=job.id).path
+    return _job_status(request, job)
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatus, response_model_exclude_none=True)
+async def get_job(
+    job_id: str,
+    request: Request,
+    wait: float = Query(default=0, ge=0, description="Long-poll: wait up to this many seconds for the job to finish"),
+) -> JobStatus:
+    job = await job_queue.wait(_get_job(job_id, request), min(wait, settings.jobs_max_wait_seconds))
+    return _job_status(request, job)
+
+
+@router.delete("/jobs/{job_id}", response_model=JobStatus, response_model_exclude_none=True)
+async def cancel_job(job_id: str, request: Request) -> JobStatus:
+    job = _get_job(job_id, request)
+    await job_queue.cancel(job)
+    return _job_status(request, job)
+
+
+@router.get("/jobs/{job_id}/pdf")
+async def get_job_pdf(job_id: str, request: Request) -> Response:
+    job = _get_job(job_id, request)
+    if job.status != SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    theme_name = job.meta.get("theme")
+    if theme_name is None:
+        raise HTTPException(status_code=404, detail="This job was submitted without render_pdf")
+    return await _pdf_response(request, job.result.sections or job.result.text, job.meta["title"], theme_name, job.meta.get("filename"))
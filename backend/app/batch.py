@@ -0,0 +1,278 @@
+"""Offline bulk adaptation: extract -> adapt -> parse -> render for many CV/job pairs.
+
+Usage:
+    python -m app.batch --manifest items.jsonl --output-dir out/
+    python -m app.batch --input-dir cvs/ --job-description job.txt --output-dir out/
+
+Manifest lines are JSON objects with an "id", a resume given as "resume_pdf"
+(path) or "resume_text", a job given as "job_description" or
+"job_description_file" (path), and optional "strategy", "title" and "theme".
+Paths are relative to the manifest. In directory mode every <id>.pdf or
+<id>.txt is a resume, paired with <id>.job.txt if present, else with
+--job-description.
+
+Each finished item is appended to <output-dir>/results.jsonl and its PDF is
+written to <output-dir>/<id>.pdf. The results file doubles as the checkpoint:
+re-running the same command skips items already recorded as "ok".
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterator, Optional, Set
+
+from app.core.config import settings
+from app.core.executor import run_blocking, run_cpu_bound, shutdown_executor
+from app.core.llm import adapt_resume, close_clients
+from app.core.pdf import extract_pdf_text, parse_text_to_sections, render_cv_pdf_from_sections
+
+
+@dataclass
+class BatchItem:
+    id: str
+    job_description: str
+    resume_text: Optional[str] = None
+    resume_pdf: Optional[Path] = None
+    strategy: Optional[str] = None
+    title: Optional[str] = None
+    theme: Optional[str] = None
+
+
+def _read_text(path: Path) -> str:
+    return path.read_text(encoding="utf-8")
+
+
+def iter_manifest(path: Path) -> Iterator[BatchItem]:
+    base = path.parent
+    with path.open(encoding="utf-8") as fh:
+        for line_no, line in enumerate(fh, 1):
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            item_id = str(entry.get("id") or line_no)
+            job = entry.get("job_description")
+            if job is None and entry.get("job_description_file"):
+                job = _read_text(base / entry["job_description_file"])
+            if job is None:
+                raise ValueError(f"{path}:{line_no}: job_description or job_description_file is required")
+            resume_pdf = base / entry["resume_pdf"] if entry.get("resume_pdf") else None
+            if resume_pdf is None and entry.get("resume_text") is None:
+                raise ValueError(f"{path}:{line_no}: resume_pdf or resume_text is required")
+            yield BatchItem(
+                id=item_id,
+                job_description=job,
+                resume_text=entry.get("resume_text"),
+                resume_pdf=resume_pdf,
+                strategy=entry.get("strategy"),
+                title=entry.get("title"),
+                theme=entry.get("theme"),
+            )
+
+
+def iter_directory(directory: Path, default_job: Optional[str], exclude: Optional[Path] = None) -> Iterator[BatchItem]:
+    """Items for the resumes in directory; exclude is the shared job description file, if it lives there."""
+    excluded = exclude.resolve() if exclude is not None else None
+    for path in sorted(directory.iterdir()):
+        if path.suffix.lower() not in (".pdf", ".txt") or path.name.endswith(".job.txt"):
+            continue
+        if excluded is not None and path.resolve() == excluded:
+            continue
+        job_file = path.with_name(f"{path.stem}.job.txt")
+        job = _read_text(job_file) if job_file.exists() else default_job
+        if job is None:
+            raise ValueError(f"No job description for {path.name}: add {job_file.name} or pass --job-description")
+        if path.suffix.lower() == ".pdf":
+            yield BatchItem(id=path.stem, job_description=job, resume_pdf=path)
+        else:
+            yield BatchItem(id=path.stem, job_description=job, resume_text=_read_text(path))
+
+
+def load_completed(results_path: Path) -> Set[str]:
+    completed: Set[str] = set()
+    if not results_path.exists():
+        return completed
+    with results_path.open("rb+") as fh:
+        # Terminate a line cut off by a crash so new records don't get appended onto it
+        if fh.seek(0, 2) and (fh.seek(-1, 2), fh.read(1))[1] != b"\n":
+            fh.write(b"\n")
+    with results_path.open(encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a truncated last line; that item simply reruns
+                continue
+            if record.get("status") == "ok":
+                completed.add(str(record.get("id")))
+    return completed
+
+
+def _write_pdf(path: Path, pdf_bytes: bytes) -> None:
+    # Write then rename so an interrupted run never leaves a half-written PDF
+    tmp = path.with_suffix(".pdf.tmp")
+    tmp.write_bytes(pdf_bytes)
+    tmp.replace(path)
+
+
+class Pipeline:
+    """Runs items through the stages concurrently, with a separate limit per stage.
+
+    Extraction and rendering are bounded by the CPU pool size and LLM calls by
+    --concurrency, so while some items wait on the model others are parsed or
+    rendered.
+    """
+
+    def __init__(self, output_dir: Path, concurrency: int, cpu_slots: int, default_theme: Optional[str]) -> None:
+        self.output_dir = output_dir
+        self.results_path = output_dir / "results.jsonl"
+        self.default_theme = default_theme
+        self.workers = concurrency + cpu_slots * 2
+        self._llm_slots = asyncio.Semaphore(concurrency)
+        self._cpu_slots = asyncio.Semaphore(cpu_slots)
+        self._results_lock = asyncio.Lock()
+        self.succeeded = 0
+        self.failed = 0
+
+    async def _process(self, item: BatchItem) -> Dict[str, object]:
+        timings: Dict[str, float] = {}
+
+        start = time.perf_counter()
+        if item.resume_text is not None:
+            resume_text = item.resume_text
+        else:
+            # Workers memory-map the file themselves, so the PDF is never read into this process
+            async with self._cpu_slots:
+                extracted = await run_cpu_bound(
+                    extract_pdf_text,
+                    str(item.resume_pdf),
+                    max_pages=settings.pdf_extract_max_pages,
+                    max_chars=settings.pdf_extract_max_chars,
+                )
+            resume_text = extracted.text
+        if not resume_text.strip():
+            raise ValueError("No extractable resume text")
+        timings["extract_ms"] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        async with self._llm_slots:
+            adapted = await adapt_resume(resume_text, item.job_description, item.strategy)
+        timings["adapt_ms"] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        sections = adapted.sections or parse_text_to_sections(adapted.text)
+        async with self._cpu_slots:
+            pdf_bytes = await run_cpu_bound(
+                render_cv_pdf_from_sections,
+                sections,
+                title=item.title or "Curriculum Vitae",
+                theme=item.theme or self.default_theme,
+            )
+        pdf_path = self.output_dir / f"{item.id}.pdf"
+        await run_blocking(_write_pdf, pdf_path, pdf_bytes)
+        timings["render_ms"] = (time.perf_counter() - start) * 1000
+
+        return {"pdf": pdf_path.name, "adapted_resume": adapted.text, "model": adapted.model, **{k: round(v, 1) for k, v in timings.items()}}
+
+    async def _record(self, record: Dict[str, object]) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        async with self._results_lock:
+            with self.results_path.open("a", encoding="utf-8") as fh:
+                fh.write(line)
+                fh.flush()
+
+    async def run_item(self, item: BatchItem) -> None:
+        try:
+            result = await self._process(item)
+        except Exception as exc:
+            self.failed += 1
+            await self._record({"id": item.id, "status": "error", "error": str(exc) or exc.__class__.__name__})
+            print(f"[error] {item.id}: {exc}", file=sys.stderr)
+            return
+        self.succeeded += 1
+        await self._record({"id": item.id, "status": "ok", **result})
+
+    async def run(self, items: AsyncIterator[BatchItem]) -> None:
+        queue: "asyncio.Queue[Optional[BatchItem]]" = asyncio.Queue(maxsize=self.workers * 2)
+
+        async def worker() -> None:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                await self.run_item(item)
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.workers)]
+        async for item in items:
+            await queue.put(item)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+
+
+async def _pending(items: Iterator[BatchItem], completed: Set[str], skipped: list) -> AsyncIterator[BatchItem]:
+    seen: Set[str] = set()
+    for item in items:
+        if item.id in seen:
+            raise ValueError(f"Duplicate item id {item.id!r}")
+        seen.add(item.id)
+        if item.id in completed:
+            skipped.append(item.id)
+            continue
+        yield item
+
+
+async def run_batch(args: argparse.Namespace) -> int:
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    if args.manifest:
+        items = iter_manifest(args.manifest)
+    else:
+        default_job = _read_text(args.job_description) if args.job_description else None
+        items = iter_directory(args.input_dir, default_job, exclude=args.job_description)
+
+    pipeline = Pipeline(args.output_dir, args.concurrency, max(settings.cpu_pool_workers, 1), args.theme)
+    completed = set() if args.restart else load_completed(pipeline.results_path)
+    if args.restart and pipeline.results_path.exists():
+        pipeline.results_path.unlink()
+
+    skipped: list = []
+    started = time.perf_counter()
+    try:
+        await pipeline.run(_pending(items, completed, skipped))
+    finally:
+        await close_clients()
+        shutdown_executor()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"done: {pipeline.succeeded} ok, {pipeline.failed} failed, {len(skipped)} skipped (checkpoint) "
+        f"in {elapsed:.1f}s -> {pipeline.results_path}"
+    )
+    return 1 if pipeline.failed else 0
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.batch", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--manifest", type=Path, help="JSONL manifest of items")
+    source.add_argument("--input-dir", type=Path, help="directory of <id>.pdf / <id>.txt resumes")
+    parser.add_argument("--job-description", type=Path, help="job description file used in --input-dir mode")
+    parser.add_argument("--output-dir", type=Path, required=True)
+    parser.add_argument("--concurrency", type=int, default=settings.batch_concurrency, help="concurrent LLM calls")
+    parser.add_argument("--theme", default=None, help="PDF theme for items that don't set one")
+    parser.add_argument("--fake-llm", action="store_true", help="use the offline fake LLM backend")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and process every item again")
+    args = parser.parse_args(argv)
+
+    if args.fake_llm:
+        settings.llm_backend = "fake"
+    return asyncio.run(run_batch(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,31 @@
 from __future__ import annotations
 
-from authlib.integrations.starlette_client import OAuth
+from functools import lru_cache
 
 from app.core.config import settings
 
 
-oauth = OAuth()
+def oauth_configured() -> bool:
+    # Requires CV_ADAPTER_GOOGLE_CLIENT_ID and CV_ADAPTER_GOOGLE_CLIENT_SECRET to be set
+    return bool(settings.google_client_id and settings.google_client_secret)
 
-# Register Google as an OpenID Connect provider
-# Requires CV_ADAPTER_GOOGLE_CLIENT_ID and CV_ADAPTER_GOOGLE_CLIENT_SECRET to be set
-oauth.register(
-    name="google",
-    server_metadata_url="https://accounts.google.com/.well-known/openid-configuration",
-    client_id=settings.google_client_id or "",
-    client_secret=settings.google_client_secret or "",
-    client_kwargs={
-        "scope": "openid email profile",
-    },
-) 
\ No newline at end of file
+
+@lru_cache(maxsize=None)
+def get_oauth():
+    """OAuth registry with Google as an OpenID Connect provider, built on first use.
+
+    authlib is only imported once sign-in is actually configured and used.
+    """
+    from authlib.integrations.starlette_client import OAuth
+
+    oauth = OAuth()
+    oauth.register(
+        name="google",
+        server_metadata_url="https://accounts.google.com/.well-known/openid-configuration",
+        client_id=settings.google_client_id or "",
+        client_secret=settings.google_client_secret or "",
+        client_kwargs={
+            "scope": "openid email profile",
+        },
+    )
+    return oauth
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Optional, Protocol, Tuple, TypeVar, Union
+
+from app.core.config import settings
+
+
+V = TypeVar("V", bound=Union[str, bytes])
+
+_WS_RE = re.compile(r"[ \t\r\f\v]+")
+
+
+def normalize_text(text: str) -> str:
+    """Whitespace-insensitive form of free text, used for cache keys only."""
+    lines = (_WS_RE.sub(" ", line).strip() for line in text.strip().splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def make_cache_key(*parts: Any) -> str:
+    payload = json.dumps(parts, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CacheBackend(Protocol):
+    # True if get/set do I/O and should be kept off the event loop
+    blocking: bool
+
+    def get(self, key: str) -> Optional[str]: ...
+
+    def set(self, key: str, value: str) -> None: ...
+
+    def size(self) -> int: ...
+
+    def clear(self) -> None: ...
+
+
+class MemoryCache:
+    """Per-process LRU cache with a TTL on every entry."""
+
+    blocking = False
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._data[key] = (time.time() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def size(self) -> int:
+        return len(self._data)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class SqliteCache:
+    """On-disk LRU+TTL cache shared by every worker process pointing at the same file."""
+
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: float) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at)")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute("SELECT value, expires_at FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at <= now:
+            conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            return None
+        conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        conn = self._conn()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO results (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, value, now + self.ttl_seconds, now),
+        )
+        conn.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+        conn.execute(
+            "DELETE FROM results WHERE key IN ("
+            "SELECT key FROM results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def size(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def clear(self) -> None:
+        self._conn().execute("DELETE FROM results")
+
+
+class SizedLRU(Generic[V]):
+    """Thread-safe in-memory LRU bounded by the total size of its values in bytes."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[str, Tuple[int, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _sizeof(value: V) -> int:
+        return len(value) if isinstance(value, bytes) else len(value.encode("utf-8"))
+
+    def get(self, key: str) -> Optional[V]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: V) -> None:
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous[0]
+            self._data[key] = (size, value)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (evicted_size, _) = self._data.popitem(last=False)
+                self.total_bytes -= evicted_size
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class ResultCache:
+    """Async facade over a cache backend that also counts hits and misses."""
+
+    def __init__(self, backend: CacheBackend, name: str) -> None:
+        self.backend = backend
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+
+    async def _call(self, fn, *args):
+        if self.backend.blocking:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self._call(self.backend.get, key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: str) -> None:
+        await self._call(self.backend.set, key, value)
+
+    async def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": await self._call(self.backend.size),
+        }
+
+
+def build_result_cache() -> Optional[ResultCache]:
+    backend_name = settings.cache_backend.lower()
+    if backend_name == "none":
+        return None
+    if backend_name == "sqlite":
+        backend: CacheBackend = SqliteCache(settings.cache_path, settings.cache_max_entries, settings.cache_ttl_seconds)
+    elif backend_name == "memory":
+        backend = MemoryCache(settings.cache_max_entries, settings.cache_ttl_seconds)
+    else:
+        raise RuntimeError(f"Unknown cache backend: {settings.cache_backend!r} (expected memory, sqlite or none)")
+    return ResultCache(backend, backend_name)
+
+
+result_cache = build_result_cache()
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Dict, Tuple
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    import httpx
+    from openai import AsyncOpenAI
+
+
+TIERS = ("standard", "premium")
+
+
+class ClientRegistry:
+    """Process-wide pool of AsyncOpenAI clients, one per (api_key, tier).
+
+    Each client owns a pooled httpx.AsyncClient so connections (and their TLS
+    sessions) are reused across requests instead of being rebuilt per call.
+    """
+
+    def __init__(self) -> None:
+        self._clients: Dict[Tuple[str, str], AsyncOpenAI] = {}
+
+    def _build_http_client(self) -> httpx.AsyncClient:
+        import httpx
+
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.openai_max_connections,
+                max_keepalive_connections=settings.openai_max_keepalive_connections,
+                keepalive_expiry=settings.openai_keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                settings.openai_timeout,
+                connect=settings.openai_connect_timeout,
+            ),
+        )
+
+    def get(self, api_key: str, tier: str) -> AsyncOpenAI:
+        key = (api_key, tier)
+        client = self._clients.get(key)
+        if client is None:
+            # openai takes ~0.3 s to import; load it with the first client, not with the app
+            from openai import AsyncOpenAI
+
+            client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=settings.openai_base_url,
+                max_retries=settings.openai_max_retries,
+                http_client=self._build_http_client(),
+            )
+            self._clients[key] = client
+        return client
+
+    def open(self, api_key: str | None) -> None:
+        # Create the clients up front so the first request doesn't pay for it
+        if not api_key:
+            return
+        for tier in TIERS:
+            self.get(api_key, tier)
+
+    async def aclose(self) -> None:
+        clients = list(self._clients.values())
+        self._clients.clear()
+        await asyncio.gather(*(client.close() for client in clients), return_exceptions=True)
+
+
+registry = ClientRegistry()
@@ -11,6 +11,106 @@ class Settings(BaseSettings):
     # Premium model used when the user is authenticated (same API key)
     premium_openai_model: str = "gpt-5-mini"
 
+    # "openai", or "fake" for a deterministic offline stand-in (no API key needed)
+    llm_backend: str = "openai"
+    fake_llm_latency: float = 0.0
+
+    # OpenAI HTTP connection pool (shared per API key and model tier)
+    openai_base_url: str | None = None  # e.g. a local stub server for testing
+    openai_max_connections: int = 100
+    openai_max_keepalive_connections: int = 20
+    openai_keepalive_expiry: float = 30.0
+    openai_timeout: float = 120.0
+    openai_connect_timeout: float = 5.0
+    openai_max_retries: int = 0  # retries are handled by app.core.resilience
+
+    # Client-side protection of the LLM backend, applied per model tier (0 disables a limit)
+    llm_requests_per_minute: int = 500
+    llm_tokens_per_minute: int = 400_000
+    llm_max_queue_wait_seconds: float = 30.0  # shed load (503) instead of queueing longer
+    llm_max_attempts: int = 3
+    llm_backoff_base: float = 0.5
+    llm_backoff_max: float = 20.0
+    llm_breaker_failure_threshold: int = 5
+    llm_breaker_reset_seconds: float = 30.0
+    # gpt-5: retry via Chat Completions when the Responses API returns no text (costs a second call)
+    openai_gpt5_chat_fallback: bool = True
+
+    # Model routing: send premium calls to openai_model while the premium model is busy or slow (0 disables a check)
+    routing_premium_max_in_flight: int = 50
+    routing_premium_max_latency_seconds: float = 60.0  # predicted from the call's size and recent latency
+    routing_stats_ttl_seconds: float = 120.0  # latency samples older than this are ignored
+    # Send a second request when a call is still running after this long; first answer wins (0 = off, costs a call)
+    routing_hedge_after_seconds: float = 0.0
+
+    # Batch adaptation (/api/adapt/batch)
+    batch_max_items: int = 50
+    batch_concurrency: int = 5
+
+    # Background adaptation jobs (/api/jobs)
+    jobs_workers: int = 4
+    jobs_max_queued: int = 100  # further submissions get 429
+    jobs_max_active_per_user: int = 3  # queued + running per signed-in user (or client IP when anonymous)
+    jobs_result_ttl_seconds: float = 3600.0
+    jobs_max_wait_seconds: float = 30.0  # longest long-poll on GET /api/jobs/{id}?wait=
+
+    # Extracted PDF text, keyed by SHA-256 of the upload (bounded by total text size)
+    pdf_text_cache_max_bytes: int = 32 * 1024 * 1024
+    # Rendered PDFs, keyed by text/title/theme (bounded by total PDF size)
+    pdf_render_cache_max_bytes: int = 64 * 1024 * 1024
+    # Structured resume sections keyed by content id, for /api/pdf/sections (bounded by total JSON size)
+    section_cache_max_bytes: int = 16 * 1024 * 1024
+
+    # Clean up resume/job text (whitespace, hyphenation, repeats, boilerplate) before prompting
+    prompt_compaction: bool = True
+    # Token cap for resume + job description in one prompt (0 = only the model's context limit)
+    prompt_max_input_tokens: int = 6000
+
+    # Adapt long resumes section by section in parallel: off | auto | always
+    adapt_split_mode: str = "off"
+    # In auto mode, split resumes of at least this many (estimated) tokens
+    adapt_split_min_tokens: int = 1200
+    # After a split adaptation, run one more call to smooth tone and remove repetition across sections
+    adapt_consistency_pass: bool = False
+    # "text", or "json" to have the model return sections that are validated and rendered without re-parsing
+    adapt_output_format: str = "text"
+
+    # Add a Server-Timing header with per-stage durations to every response
+    server_timing_header: bool = False
+
+    # After startup, load openai/pypdf/reportlab, the OpenAI clients, PDF themes and a PDF worker in the
+    # background, so neither the port binding nor the first requests wait for them
+    startup_warmup: bool = True
+
+    # Frontend files (index.html, /static) held in memory, with their gzip/brotli variants
+    static_cache_max_bytes: int = 32 * 1024 * 1024
+    # Re-read index.html and static files when they change on disk (development)
+    frontend_reload: bool = False
+
+    # Threads used for blocking work off the event loop
+    blocking_max_workers: int = 4
+
+    # Process pool for CPU-bound PDF parsing/rendering (0 = use the thread pool instead)
+    cpu_pool_workers: int = 2
+    cpu_pool_max_tasks_per_child: int = 100  # recycle workers after N jobs (0 = never)
+    cpu_job_timeout_seconds: float = 20.0
+    cpu_worker_memory_limit_mb: int = 1024  # 0 = unlimited
+    # Uploads are spooled to disk and memory-mapped, so portfolio-sized PDFs no longer cost their size in RAM
+    pdf_max_upload_bytes: int = 50 * 1024 * 1024
+    pdf_max_text_chars: int = 200_000
+
+    # Resume text extraction: read at most this many pages, stopping early once enough text is found (0 = no limit)
+    pdf_extract_max_pages: int = 2
+    pdf_extract_max_chars: int = 20_000
+    # Uploads larger than this are spooled to a temp file and memory-mapped by the worker instead of copied
+    pdf_spool_threshold_bytes: int = 1024 * 1024
+
+    # Adaptation result cache: "memory" (per process), "sqlite" (shared across workers) or "none"
+    cache_backend: str = "memory"
+    cache_max_entries: int = 1024
+    cache_ttl_seconds: float = 24 * 3600
+    cache_path: str = "/tmp/cv-adapter-cache.sqlite3"
+
     # Google OAuth (OIDC)
     google_client_id: str | None = None
     google_client_secret: str | None = None
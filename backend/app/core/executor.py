@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import weakref
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Optional, Tuple, TypeVar
+
+from app.core.config import settings
+
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+# Pools whose workers were killed because one of their jobs timed out
+_killed_pools: "weakref.WeakSet[ProcessPoolExecutor]" = weakref.WeakSet()
+# No-op jobs submitted to each new pool; done once all of its workers have started
+_pool_warmups: "weakref.WeakKeyDictionary[ProcessPoolExecutor, Tuple[Future[None], ...]]" = weakref.WeakKeyDictionary()
+# One slot per pool worker and event loop, so jobs never wait in the pool's queue under the timeout
+_cpu_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[int, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+class WorkerTimeoutError(RuntimeError):
+    """A CPU-bound job exceeded cpu_job_timeout_seconds and its worker was killed."""
+
+
+class WorkerCrashedError(RuntimeError):
+    """A worker process died (e.g. hit its memory limit), failing the jobs running in its pool."""
+
+
+def get_executor() -> ThreadPoolExecutor:
+    # Bounded pool for blocking work (PDF parsing/rendering) so it never runs on the event loop
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.blocking_max_workers,
+            thread_name_prefix="cv-adapter-blocking",
+        )
+    return _executor
+
+
+async def run_blocking(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), partial(fn, *args, **kwargs))
+
+
+def _init_worker(memory_limit_bytes: int) -> None:
+    # Cap the address space of each worker so a pathological PDF can't exhaust host memory
+    if memory_limit_bytes <= 0:
+        return
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return
+    resource.setrlimit(resource.RLIMIT_AS, (memory_limit_bytes, memory_limit_bytes))
+
+
+def _noop() -> None:
+    return None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.cpu_pool_workers,
+            # spawn: don't fork a process that is running an event loop and threads
+            mp_context=multiprocessing.get_context("spawn"),
+            max_tasks_per_child=settings.cpu_pool_max_tasks_per_child or None,
+            initializer=_init_worker,
+            initargs=(settings.cpu_worker_memory_limit_mb * 1024 * 1024,),
+        )
+        # Each submit with no idle worker spawns one, so this starts the whole pool up front
+        _pool_warmups[_process_pool] = tuple(_process_pool.submit(_noop) for _ in range(settings.cpu_pool_workers))
+    return _process_pool
+
+
+def _discard_process_pool(pool: ProcessPoolExecutor) -> None:
+    # ProcessPoolExecutor can't cancel a running job, so kill its workers and start a fresh pool
+    global _process_pool
+    if _process_pool is pool:
+        _process_pool = None
+    # CPython detail: the executor has no public handle on its workers. Fail loudly if that
+    # changes instead of leaving a timed-out job running.
+    if not hasattr(pool, "_processes"):
+        raise RuntimeError("ProcessPoolExecutor no longer exposes _processes; can't kill its workers")
+    for process in list((pool._processes or {}).values()):
+        if process.is_alive():
+            process.kill()
+    # Jobs still queued fail with BrokenProcessPool (and are retried) rather than being cancelled
+    pool.shutdown(wait=False)
+
+
+def _submit(fn: Callable[..., T], *args: Any, **kwargs: Any) -> Tuple[ProcessPoolExecutor, "Future[T]"]:
+    pool = get_process_pool()
+    try:
+        return pool, pool.submit(partial(fn, *args, **kwargs))
+    except BrokenProcessPool:
+        _discard_process_pool(pool)
+        pool = get_process_pool()
+        return pool, pool.submit(partial(fn, *args, **kwargs))
+
+
+def _get_cpu_slots() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    entry = _cpu_slots.get(loop)
+    if entry is None or entry[0] != settings.cpu_pool_workers:
+        entry = _cpu_slots[loop] = (settings.cpu_pool_workers, asyncio.Semaphore(settings.cpu_pool_workers))
+    return entry[1]
+
+
+async def run_cpu_bound(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run CPU-bound work in the process pool with a per-job timeout.
+
+    Falls back to the thread executor when cpu_pool_workers is 0. Jobs wait
+    for a free, started worker before the clock starts, so the timeout only
+    covers time spent running. A timed-out job kills the workers of its pool;
+    the other jobs running there are run once more on a fresh pool instead of
+    failing with it.
+    """
+    if settings.cpu_pool_workers <= 0:
+        return await run_blocking(fn, *args, **kwargs)
+
+    async with _get_cpu_slots():
+        return await _run_in_pool(fn, *args, **kwargs)
+
+
+async def _run_in_pool(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    retried = False
+    while True:
+        pool, future = _submit(fn, *args, **kwargs)
+        try:
+            # Worker start-up (spawn + imports) isn't the job's time: start the clock once the pool is up
+            await asyncio.gather(*(asyncio.wrap_future(warmup) for warmup in _pool_warmups.get(pool, ())))
+            return await asyncio.wait_for(asyncio.wrap_future(future), settings.cpu_job_timeout_seconds)
+        except asyncio.TimeoutError:
+            _killed_pools.add(pool)
+            _discard_process_pool(pool)
+            raise WorkerTimeoutError(f"Job timed out after {settings.cpu_job_timeout_seconds:g}s")
+        except BrokenProcessPool as exc:
+            # A worker died (e.g. hit its memory limit) or the pool was killed; don't reuse it
+            _discard_process_pool(pool)
+            if pool in _killed_pools and not retried:
+                # Killed because another job in the pool timed out, not because of this one: run it again
+                retried = True
+                continue
+            raise WorkerCrashedError("A PDF worker process died") from exc
+
+
+def shutdown_executor() -> None:
+    global _executor, _process_pool
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    if _process_pool is not None:
+        # Wait so worker processes exit cleanly; running jobs are bounded by the job timeout
+        _process_pool.shutdown(wait=True, cancel_futures=True)
+        _process_pool = None
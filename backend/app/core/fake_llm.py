@@ -0,0 +1,148 @@
+"""Offline stand-in for AsyncOpenAI, selected with CV_ADAPTER_LLM_BACKEND=fake.
+
+It answers both the Chat Completions and Responses APIs (streaming included)
+with a deterministic resume built from the prompt, so the adapt pipeline and
+batch CLI can run without network access or an API key.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+import time
+from types import SimpleNamespace
+from typing import AsyncIterator, List, Optional
+
+from app.core.config import settings
+from app.core.pdf import parse_text_to_sections
+
+
+_SECTION_RE = re.compile(r"Job Description:\n(?P<job>.*?)\n\nCandidate Resume:\n(?P<resume>.*?)(?:\n\nTasks:|\Z)", re.S)
+_WORD_RE = re.compile(r"[A-Za-z][A-Za-z+#.\-]{2,}")
+
+
+def fake_adaptation(prompt: str) -> str:
+    match = _SECTION_RE.search(prompt)
+    job = match.group("job") if match else ""
+    resume = match.group("resume") if match else prompt
+    job_title = next((ln.strip() for ln in job.splitlines() if ln.strip()), "the role")
+
+    keywords: List[str] = []
+    for word in _WORD_RE.findall(job):
+        if word[0].isupper() and word not in keywords:
+            keywords.append(word)
+
+    lines = ["**Summary**", f"Candidate profile tailored for {job_title[:80]}.", "**Experience**"]
+    for line in resume.splitlines():
+        line = line.strip().lstrip("-•").strip()
+        if line:
+            lines.append(f"- {line}")
+        if len(lines) >= 40:
+            break
+    lines.append("**Skills**")
+    lines.append(", ".join(keywords[:15]) or "Communication, Problem solving")
+    return "\n".join(lines)
+
+
+def fake_structured_adaptation(prompt: str) -> str:
+    """fake_adaptation as JSON in the shape of app.models.schemas.StructuredResume."""
+    sections = [
+        {"blocks": [{"type": block["type"], "text": block.get("text", ""), "items": block.get("items", [])} for block in section["blocks"]]}
+        for section in parse_text_to_sections(fake_adaptation(prompt))
+    ]
+    return json.dumps({"sections": sections})
+
+
+def _usage(prompt: str, completion: str) -> SimpleNamespace:
+    prompt_tokens = len(prompt) // 4
+    completion_tokens = len(completion) // 4
+    return SimpleNamespace(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        input_tokens=prompt_tokens,
+        output_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens,
+    )
+
+
+class _FakeStream:
+    def __init__(self, events: List[SimpleNamespace]) -> None:
+        self._events = events
+        self.closed = False
+
+    def __aiter__(self) -> AsyncIterator[SimpleNamespace]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[SimpleNamespace]:
+        for event in self._events:
+            if self.closed:
+                return
+            await asyncio.sleep(0)
+            yield event
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+def _chunks(text: str) -> List[str]:
+    return re.findall(r"\S+\s*|\s+", text)
+
+
+class _FakeChatCompletions:
+    async def create(self, *, model: str, messages: list, stream: bool = False, response_format: Optional[dict] = None, **_: object):
+        if settings.fake_llm_latency:
+            await asyncio.sleep(settings.fake_llm_latency)
+        prompt = "\n\n".join(str(m.get("content", "")) for m in messages)
+        text = fake_structured_adaptation(prompt) if response_format else fake_adaptation(prompt)
+        if stream:
+            events = [
+                SimpleNamespace(choices=[SimpleNamespace(index=0, delta=SimpleNamespace(content=chunk))], usage=None)
+                for chunk in _chunks(text)
+            ]
+            events.append(SimpleNamespace(choices=[], usage=_usage(prompt, text)))
+            return _FakeStream(events)
+        return SimpleNamespace(
+            id=f"fake-{int(time.time() * 1000)}",
+            model=model,
+            choices=[SimpleNamespace(index=0, finish_reason="stop", message=SimpleNamespace(role="assistant", content=text))],
+            usage=_usage(prompt, text),
+        )
+
+
+class _FakeResponses:
+    async def create(self, *, model: str, input: str, stream: bool = False, text: Optional[dict] = None, **_: object):
+        if settings.fake_llm_latency:
+            await asyncio.sleep(settings.fake_llm_latency)
+        # text carries the Structured Outputs format
+        output = fake_structured_adaptation(input) if text else fake_adaptation(input)
+        if stream:
+            events = [SimpleNamespace(type="response.output_text.delta", delta=chunk) for chunk in _chunks(output)]
+            events.append(SimpleNamespace(type="response.completed", response=SimpleNamespace(usage=_usage(input, output))))
+            return _FakeStream(events)
+        return SimpleNamespace(
+            id=f"fake-{int(time.time() * 1000)}",
+            model=model,
+            output_text=output,
+            usage=_usage(input, output),
+        )
+
+
+class FakeAsyncOpenAI:
+    """Duck-typed subset of AsyncOpenAI used by app.core.llm."""
+
+    def __init__(self) -> None:
+        self.chat = SimpleNamespace(completions=_FakeChatCompletions())
+        self.responses = _FakeResponses()
+
+    async def close(self) -> None:
+        return None
+
+
+_fake_client: Optional[FakeAsyncOpenAI] = None
+
+
+def get_fake_client() -> FakeAsyncOpenAI:
+    global _fake_client
+    if _fake_client is None:
+        _fake_client = FakeAsyncOpenAI()
+    return _fake_client
@@ -0,0 +1,226 @@
+"""Serving the built frontend (index.html and /static) from memory.
+
+Each file is read once, hashed for a strong ETag and compressed once (gzip,
+plus brotli when the optional `brotli` package is installed), instead of
+being read from disk on every request. Vite puts a content hash in the names
+of the files it emits under assets/, so browsers may cache those forever;
+everything else is revalidated with its ETag.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import stat
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Scope
+
+from app.core.config import settings
+from app.core.executor import run_blocking
+
+try:
+    import brotli
+except ImportError:  # optional; only gzip variants are served without it
+    brotli = None
+
+
+logger = logging.getLogger(__name__)
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Vite's default output name for bundled files: assets/[name]-[hash].[ext]
+_HASHED_ASSET_RE = re.compile(r"^assets/.+-[A-Za-z0-9_-]{8}\.[A-Za-z0-9]+$")
+
+_COMPRESSIBLE_TYPES = ("application/javascript", "application/json", "application/manifest+json", "application/xml", "image/svg+xml")
+
+# Smaller files gain less from compression than the Content-Encoding costs
+_MIN_COMPRESS_BYTES = 512
+
+
+def _is_compressible(media_type: str) -> bool:
+    return media_type.startswith("text/") or media_type in _COMPRESSIBLE_TYPES
+
+
+def _compress(body: bytes) -> Dict[str, bytes]:
+    variants: Dict[str, bytes] = {}
+    if len(body) < _MIN_COMPRESS_BYTES:
+        return variants
+    # mtime=0 keeps the gzip output, and so its ETag, stable across restarts
+    variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+    if brotli is not None:
+        variants["br"] = brotli.compress(body, quality=11)
+    # Keep only variants that are actually smaller
+    return {encoding: data for encoding, data in variants.items() if len(data) < len(body) * 0.9}
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    accepted: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                continue
+        if name:
+            accepted[name.strip().lower()] = quality
+    return accepted
+
+
+@dataclass(frozen=True)
+class StaticEntry:
+    """One file held in memory: its bytes, compressed variants and response headers."""
+    path: str
+    body: bytes
+    media_type: str
+    cache_control: str
+    mtime_ns: int
+    size: int
+    digest: str
+    # Content-Encoding -> compressed body
+    variants: Dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.body) + sum(len(data) for data in self.variants.values())
+
+    def etag(self, encoding: Optional[str] = None) -> str:
+        # Each representation gets its own strong ETag, as a byte-for-byte comparison requires
+        return f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"'
+
+    def is_stale(self) -> bool:
+        try:
+            stat_result = os.stat(self.path)
+        except OSError:
+            return True
+        return stat_result.st_mtime_ns != self.mtime_ns or stat_result.st_size != self.size
+
+    def _choose_encoding(self, headers: Headers) -> Optional[str]:
+        if not self.variants:
+            return None
+        accepted = _accepted_encodings(headers.get("accept-encoding", ""))
+        for encoding in ("br", "gzip"):
+            if encoding in self.variants and accepted.get(encoding, 0.0) > 0:
+                return encoding
+        return None
+
+    def response(self, headers: Headers, status_code: int = 200) -> Response:
+        encoding = self._choose_encoding(headers)
+        response_headers = {"ETag": self.etag(encoding), "Cache-Control": self.cache_control}
+        if self.variants:
+            response_headers["Vary"] = "Accept-Encoding"
+
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and status_code == 200:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            # A cached copy of any representation is still current
+            if "*" in tags or self.etag() in tags or any(self.etag(name) in tags for name in self.variants):
+                return Response(status_code=304, headers=response_headers)
+
+        if encoding is not None:
+            response_headers["Content-Encoding"] = encoding
+            body = self.variants[encoding]
+        else:
+            body = self.body
+        return Response(content=body, status_code=status_code, media_type=self.media_type, headers=response_headers)
+
+
+def load_entry(path: str, cache_control: str) -> StaticEntry:
+    with open(path, "rb") as fh:
+        stat_result = os.fstat(fh.fileno())
+        body = fh.read()
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if media_type.startswith("text/") or media_type == "application/javascript":
+        media_type += "; charset=utf-8"
+    return StaticEntry(
+        path=path,
+        body=body,
+        media_type=media_type,
+        cache_control=cache_control,
+        mtime_ns=stat_result.st_mtime_ns,
+        size=stat_result.st_size,
+        digest=hashlib.sha256(body).hexdigest()[:32],
+        variants=_compress(body) if _is_compressible(media_type) else {},
+    )
+
+
+class IndexPage:
+    """The SPA's index.html, loaded once and served for every client-side route."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._entry: Optional[StaticEntry] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> Optional[StaticEntry]:
+        with self._lock:
+            try:
+                self._entry = load_entry(str(self.path), REVALIDATE_CACHE_CONTROL)
+            except FileNotFoundError:
+                self._entry = None
+        return self._entry
+
+    def get(self) -> Optional[StaticEntry]:
+        entry = self._entry
+        if entry is None or (settings.frontend_reload and entry.is_stale()):
+            # Not built yet (checked again on each request) or changed on disk in development
+            entry = self.load()
+        return entry
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles serving GET/HEAD from an in-memory cache, bounded by static_cache_max_bytes.
+
+    Paths are resolved (and checked against directory traversal) by StaticFiles
+    the first time; after that a hit needs no filesystem access. Directories,
+    errors and files that no longer fit the budget fall through to StaticFiles.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._entries: Dict[str, StaticEntry] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def _load(self, path: str) -> Optional[StaticEntry]:
+        try:
+            full_path, stat_result = self.lookup_path(path)
+        except (OSError, ValueError):
+            return None
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            return None
+        if stat_result.st_size > settings.static_cache_max_bytes - self._total_bytes:
+            return None
+        cache_control = IMMUTABLE_CACHE_CONTROL if _HASHED_ASSET_RE.match(path.replace(os.sep, "/")) else REVALIDATE_CACHE_CONTROL
+        entry = load_entry(full_path, cache_control)
+        with self._lock:
+            previous = self._entries.pop(path, None)
+            if previous is not None:
+                self._total_bytes -= previous.nbytes
+            if entry.nbytes > settings.static_cache_max_bytes - self._total_bytes:
+                return None
+            self._entries[path] = entry
+            self._total_bytes += entry.nbytes
+        return entry
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] in ("GET", "HEAD"):
+            entry = self._entries.get(path)
+            if entry is None or (settings.frontend_reload and entry.is_stale()):
+                entry = await run_blocking(self._load, path)
+            if entry is not None:
+                return entry.response(Headers(scope=scope))
+        return await super().get_response(path, scope)
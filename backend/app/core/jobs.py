@@ -0,0 +1,221 @@
+"""Background jobs for long adaptations.
+
+A client submits work and gets a job id back at once, then polls (or
+long-polls) for the result, so no HTTP connection is held open for the whole
+generation. Jobs wait in a priority queue (authenticated users first, FIFO
+within a priority) and run on a fixed number of worker tasks. Submissions are
+refused with JobRejectedError when the queue is full or the owner already has
+too many jobs queued or running.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import secrets
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_AUTHENTICATED = 0
+PRIORITY_ANONYMOUS = 1
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+JOBS = registry.counter("cv_adapter_jobs_total", "Submitted jobs by outcome", ("outcome",))
+JOB_WAIT_SECONDS = registry.histogram("cv_adapter_job_queue_wait_seconds", "Time jobs spent queued before a worker picked them up")
+
+
+class JobRejectedError(RuntimeError):
+    """The job queue is full or the owner is over its quota; surfaced to clients as 429."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass(eq=False)
+class Job:
+    id: str
+    owner: str
+    priority: int
+    sequence: int
+    work: Optional[Callable[[], Awaitable[Any]]]
+    # Caller-defined details kept with the job, e.g. for fetching the result later
+    meta: Dict[str, Any] = field(default_factory=dict)
+    status: str = QUEUED
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+    task: Optional["asyncio.Task[Any]"] = None
+
+
+class JobQueue:
+    def __init__(self, workers: int, max_queued: int, max_active_per_owner: int, ttl_seconds: float) -> None:
+        self.workers = workers
+        self.max_queued = max_queued
+        self.max_active_per_owner = max_active_per_owner
+        self.ttl_seconds = ttl_seconds
+        self._jobs: Dict[str, Job] = {}
+        # (priority, sequence, job); cancelled entries are skipped when popped
+        self._heap: List[Tuple[int, int, Job]] = []
+        self._sequence = itertools.count()
+        self._ready = asyncio.Condition()
+        self._active: Dict[str, int] = {}
+        self._queued = 0
+        self._running = 0
+        self._workers: List["asyncio.Task[None]"] = []
+        # Smoothed run time for Retry-After hints; a typical adaptation until the first job finishes
+        self._avg_run_seconds = 10.0
+        self._finished_runs = 0
+
+    def start(self) -> None:
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker(), name=f"cv-adapter-job-{i}") for i in range(self.workers)]
+
+    async def stop(self) -> None:
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    def _retry_after(self) -> float:
+        return max(1.0, self._avg_run_seconds * max(1, self._queued) / max(1, self.workers))
+
+    def _purge(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished_at is not None and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    async def submit(self, owner: str, priority: int, work: Callable[[], Awaitable[Any]], meta: Optional[Dict[str, Any]] = None) -> Job:
+        self._purge()
+        if self._queued >= self.max_queued:
+            JOBS.inc("rejected_full")
+            raise JobRejectedError("Job queue is full, try again later", retry_after=self._retry_after())
+        if self._active.get(owner, 0) >= self.max_active_per_owner:
+            JOBS.inc("rejected_quota")
+            raise JobRejectedError(
+                f"Too many jobs in progress (limit {self.max_active_per_owner}); wait for one to finish",
+                retry_after=self._avg_run_seconds,
+            )
+
+        job = Job(id=secrets.token_urlsafe(16), owner=owner, priority=priority, sequence=next(self._sequence), work=work, meta=meta or {})
+        self._jobs[job.id] = job
+        self._active[owner] = self._active.get(owner, 0) + 1
+        self._queued += 1
+        JOBS.inc("accepted")
+        async with self._ready:
+            heapq.heappush(self._heap, (priority, job.sequence, job))
+            self._ready.notify()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def position(self, job: Job) -> Optional[int]:
+        """Number of queued jobs that will start before this one, or None once it has left the queue."""
+        if job.status != QUEUED:
+            return None
+        return sum(1 for entry in self._heap if entry[2].status == QUEUED and entry[:2] < (job.priority, job.sequence))
+
+    async def wait(self, job: Job, timeout: float) -> Job:
+        if timeout > 0 and job.status not in FINISHED:
+            try:
+                await asyncio.wait_for(job.done.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return job
+
+    async def cancel(self, job: Job) -> bool:
+        if job.status == QUEUED:
+            # Left in the heap; the worker that pops it skips it
+            self._queued -= 1
+            self._finish(job, CANCELLED)
+            return True
+        if job.status == RUNNING and job.task is not None:
+            job.task.cancel()
+            await job.done.wait()
+            return True
+        return False
+
+    def _finish(self, job: Job, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        job.work = None  # drop the captured inputs
+        remaining = self._active.get(job.owner, 1) - 1
+        if remaining > 0:
+            self._active[job.owner] = remaining
+        else:
+            self._active.pop(job.owner, None)
+        JOBS.inc(status)
+        job.done.set()
+
+    async def _next_job(self) -> Job:
+        async with self._ready:
+            while True:
+                while self._heap:
+                    _, _, job = heapq.heappop(self._heap)
+                    if job.status == QUEUED:
+                        return job
+                await self._ready.wait()
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._next_job()
+            self._queued -= 1
+            self._running += 1
+            job.status = RUNNING
+            job.started_at = time.time()
+            JOB_WAIT_SECONDS.observe(job.started_at - job.created_at)
+            job.task = asyncio.create_task(job.work())
+            try:
+                # asyncio.wait doesn't raise when the job task is cancelled (DELETE), only when the worker is
+                await asyncio.wait({job.task})
+            except asyncio.CancelledError:
+                job.task.cancel()
+                self._running -= 1
+                self._finish(job, CANCELLED, error="Server is shutting down")
+                raise
+            self._running -= 1
+            run_seconds = time.time() - job.started_at
+            self._avg_run_seconds = run_seconds if not self._finished_runs else 0.8 * self._avg_run_seconds + 0.2 * run_seconds
+            self._finished_runs += 1
+            if job.task.cancelled():
+                self._finish(job, CANCELLED)
+            elif job.task.exception() is not None:
+                exc = job.task.exception()
+                logger.info("Job %s failed: %s", job.id, exc.__class__.__name__)
+                # HTTPException (e.g. a render timeout) carries its message in detail
+                self._finish(job, FAILED, error=str(getattr(exc, "detail", None) or exc) or exc.__class__.__name__)
+            else:
+                self._finish(job, SUCCEEDED, result=job.task.result())
+            job.task = None
+
+
+job_queue = JobQueue(
+    workers=settings.jobs_workers,
+    max_queued=settings.jobs_max_queued,
+    max_active_per_owner=settings.jobs_max_active_per_user,
+    ttl_seconds=settings.jobs_result_ttl_seconds,
+)
+
+registry.callback(
+    "cv_adapter_jobs_in_progress",
+    "Jobs waiting in the queue or running on a worker",
+    ("state",),
+    lambda: [((QUEUED,), job_queue._queued), ((RUNNING,), job_queue._running)],
+)
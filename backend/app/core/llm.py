@@ -1,30 +1,97 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 import os
-from typing import Optional, Tuple
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
 
-from openai import OpenAI
 from starlette.requests import Request
 
+from app.core.cache import make_cache_key, normalize_text, result_cache
+from app.core.clients import registry
 from app.core.config import settings
+from app.core.fake_llm import get_fake_client
+from app.core.metrics import LLM_CACHE, LLM_REQUESTS, record_usage, registry as metrics_registry, stage
+from app.core.pdf import ParsedSection, cache_section, section_to_text
+from app.core.prompt import compact_inputs, split_resume
+from app.core.resilience import UpstreamUnavailableError, call_llm, estimate_tokens
+from app.core.routing import ROUTED, Route, Target, plan, run_routed, track_in_flight
+from app.core.singleflight import SingleFlight
+from app.models.schemas import StructuredResume
 
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
 
-def _select_credentials(request: Optional[Request]) -> Tuple[str, str]:
-    # Always use the same API key; switch model if authenticated
-    api_key = settings.openai_api_key or os.environ.get("OPENAI_API_KEY")
-    if not api_key:
+
+logger = logging.getLogger(__name__)
+
+
+# Bump whenever the prompts change so cached results from older prompts are not reused
+PROMPT_VERSION = "2"
+
+# Identical adaptations in flight at the same time share one upstream call
+inflight = SingleFlight()
+
+metrics_registry.callback(
+    "cv_adapter_llm_in_flight",
+    "Distinct adaptations currently waiting on the LLM",
+    (),
+    lambda: [((), inflight.in_flight())],
+)
+
+
+def _get_api_key() -> Optional[str]:
+    return settings.openai_api_key or os.environ.get("OPENAI_API_KEY")
+
+
+def is_authenticated(request: Optional[Request]) -> bool:
+    return bool(getattr(request, "session", None) and request.session.get("user"))
+
+
+def _select_credentials(request: Optional[Request], authenticated: Optional[bool] = None) -> Tuple[Optional[str], str, str]:
+    # Always use the same API key; switch model (and client tier) if authenticated
+    api_key = _get_api_key()
+    if not api_key and settings.llm_backend != "fake":
         raise RuntimeError("OPENAI_API_KEY not set. Provide env var or CV_ADAPTER_OPENAI_API_KEY.")
-    is_authenticated = bool(getattr(request, "session", None) and request.session.get("user"))
-    if is_authenticated:
+    if authenticated is None:
+        authenticated = is_authenticated(request)
+    if authenticated:
         model = settings.premium_openai_model or "gpt-5-mini"
+        tier = "premium"
     else:
         model = settings.openai_model
-    return api_key, model
+        tier = "standard"
+    return api_key, model, tier
+
+
+def _get_openai_client(request: Optional[Request], authenticated: Optional[bool] = None) -> tuple[AsyncOpenAI, str, str]:
+    api_key, model, tier = _select_credentials(request, authenticated)
+    return _client(api_key, tier), model, tier
+
 
+def _client(api_key: Optional[str], tier: str) -> AsyncOpenAI:
+    if settings.llm_backend == "fake":
+        # Offline backend for local runs and tests; mimics the AsyncOpenAI surface we use
+        return get_fake_client()  # type: ignore[return-value]
+    return registry.get(api_key, tier)
 
-def _get_openai_client(request: Optional[Request]) -> tuple[OpenAI, str]:
-    api_key, model = _select_credentials(request)
-    return OpenAI(api_key=api_key), model
+
+def _get_route(request: Optional[Request], authenticated: Optional[bool] = None) -> Route:
+    """The requested model, plus the standard model as fallback for the premium tier."""
+    client, model, tier = _get_openai_client(request, authenticated)
+    primary = Target(client, model, tier)
+    if tier == "premium" and model != settings.openai_model:
+        return Route(primary, Target(_client(_get_api_key(), "standard"), settings.openai_model, "standard"))
+    return Route(primary)
+
+
+def open_clients() -> None:
+    registry.open(_get_api_key())
+
+
+async def close_clients() -> None:
+    await registry.aclose()
 
 
 def _extract_text_from_response(response) -> Optional[str]:
@@ -67,15 +134,57 @@ def _extract_text_from_response(response) -> Optional[str]:
     return None
 
 
-def adapt_resume(resume_text: str, job_description: str, strategy: str | None = None, request: Optional[Request] = None) -> str:
-    client, model = _get_openai_client(request)
+def _extract_text_from_stream_event(event) -> Optional[str]:
+    """Incremental counterpart of _extract_text_from_response for stream events.
+
+    Returns the text delta carried by a Responses API or Chat Completions stream
+    event, or None for events that carry no text.
+    """
+    # Responses API: only output text deltas carry content
+    event_type = getattr(event, "type", None)
+    if event_type is not None:
+        if event_type == "response.output_text.delta":
+            delta = getattr(event, "delta", None)
+            if isinstance(delta, str) and delta:
+                return delta
+        return None
+
+    # Chat Completions chunk shape
+    choices = getattr(event, "choices", None)
+    if choices:
+        delta = getattr(choices[0], "delta", None)
+        content = getattr(delta, "content", None)
+        if isinstance(content, str) and content:
+            return content
+
+    return None
+
+
+SYSTEM_PROMPT = (
+    "You are an expert resume editor. You adapt a candidate's resume to a given job "
+    "description while preserving truthful experience. Optimize for clarity, impact, and ATS keyword alignment. "
+    "Return clean plain text that can be pasted into a resume. You can use '*'s as basic markdown formatting for important information, but keep it minimal. "
+    "Avoid hallucinating facts. Do not fabricate statements."
+)
 
-    system_prompt = (
-        "You are an expert resume editor. You adapt a candidate's resume to a given job "
-        "description while preserving truthful experience. Optimize for clarity, impact, and ATS keyword alignment. "
-        "Return clean plain text that can be pasted into a resume. You can use '*'s as basic markdown formatting for important information, but keep it minimal. "
-        "Avoid hallucinating facts. Do not fabricate statements."
-    )
+
+STRUCTURED_SYSTEM_PROMPT = (
+    "You are an expert resume editor. You adapt a candidate's resume to a given job "
+    "description while preserving truthful experience. Optimize for clarity, impact, and ATS keyword alignment. "
+    "Return the resume as JSON matching the given schema. You can use '*'s as basic markdown formatting for important information, but keep it minimal. "
+    "Avoid hallucinating facts. Do not fabricate statements."
+)
+
+# Replaces the last task of the text prompt in structured mode
+STRUCTURED_TASK = (
+    "4) Return one entry in sections per resume section (Summary, Experience, Skills, Education), each starting "
+    "with a heading block. Use subheading blocks for role and company lines, meta blocks for dates and locations, "
+    "list blocks (with items) for bullets and paragraph blocks for other text."
+)
+
+
+def _build_prompts(resume_text: str, job_description: str, strategy: str | None, structured: bool = False) -> Tuple[str, str]:
+    system_prompt = STRUCTURED_SYSTEM_PROMPT if structured else SYSTEM_PROMPT
 
     user_prompt = (
         f"Strategy: {strategy or 'default'}\n\n"
@@ -85,43 +194,428 @@ def adapt_resume(resume_text: str, job_description: str, strategy: str | None =
         "1) Highlight relevant experience and skills that match the job description.\n"
         "2) Adjust wording to include role-appropriate keywords without fabricating.\n"
         "3) Tighten bullets for measurable impact (action + scope + result).\n"
-        "4) Keep the output as a resume sectioned text (Summary, Experience, Skills, Education)."
+        + (STRUCTURED_TASK if structured else "4) Keep the output as a resume sectioned text (Summary, Experience, Skills, Education).")
+    )
+    return system_prompt, user_prompt
+
+
+def _build_section_prompts(section_text: str, title: str, job_description: str, strategy: str | None) -> Tuple[str, str]:
+    # Same shared job context as _build_prompts, but the model only sees (and returns) one section
+    user_prompt = (
+        f"Strategy: {strategy or 'default'}\n\n"
+        f"Job Description:\n{job_description}\n\n"
+        f"Candidate Resume:\n{section_text}\n\n"
+        "Tasks:\n"
+        f"1) This is only the \"{title}\" section of the resume; adapt just this section to the job description.\n"
+        "2) Adjust wording to include role-appropriate keywords without fabricating.\n"
+        "3) Tighten bullets for measurable impact (action + scope + result).\n"
+        f"4) Start the output with the heading **{title}** and do not add any other sections."
+    )
+    return SYSTEM_PROMPT, user_prompt
+
+
+def _build_consistency_prompts(merged_text: str, job_description: str) -> Tuple[str, str]:
+    user_prompt = (
+        f"Job Description:\n{job_description}\n\n"
+        f"Candidate Resume:\n{merged_text}\n\n"
+        "Tasks:\n"
+        "The sections of this resume were adapted independently. Make tone, tense and terminology consistent "
+        "across sections and remove repetition between them. Keep every section, its heading and its order; "
+        "do not add new facts. Return the full resume."
+    )
+    return SYSTEM_PROMPT, user_prompt
+
+
+def _is_gpt5(model: str) -> bool:
+    return model.lower().startswith("gpt-5")
+
+
+def _strict_json_schema(schema: Any) -> Any:
+    # Structured Outputs' strict mode wants every property required, no extra properties and no defaults
+    if isinstance(schema, dict):
+        schema = {key: _strict_json_schema(value) for key, value in schema.items() if key != "default"}
+        if "properties" in schema:
+            schema["required"] = list(schema["properties"])
+            schema["additionalProperties"] = False
+    elif isinstance(schema, list):
+        schema = [_strict_json_schema(value) for value in schema]
+    return schema
+
+
+@lru_cache(maxsize=None)
+def _resume_json_schema() -> Dict[str, Any]:
+    return _strict_json_schema(StructuredResume.model_json_schema())
+
+
+def _responses_kwargs(
+    model: str,
+    system_prompt: str,
+    user_prompt: str,
+    max_output_tokens: Optional[int] = None,
+    structured: bool = False,
+) -> dict:
+    kwargs: dict = {
+        "model": model,
+        "input": f"System: {system_prompt}\n\nUser: {user_prompt}",
+        "max_output_tokens": max_output_tokens or settings.openai_max_output_tokens,
+    }
+    if structured:
+        kwargs["text"] = {"format": {"type": "json_schema", "name": "resume", "schema": _resume_json_schema(), "strict": True}}
+    return kwargs
+
+
+def _chat_kwargs(
+    model: str,
+    system_prompt: str,
+    user_prompt: str,
+    max_output_tokens: Optional[int] = None,
+    structured: bool = False,
+) -> dict:
+    kwargs: dict = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ],
+    }
+    if structured:
+        kwargs["response_format"] = {
+            "type": "json_schema",
+            "json_schema": {"name": "resume", "schema": _resume_json_schema(), "strict": True},
+        }
+    if not _is_gpt5(model):
+        # gpt-5 fallback goes without unsupported params
+        kwargs["max_tokens"] = max_output_tokens or settings.openai_max_output_tokens
+        kwargs["temperature"] = settings.openai_temperature
+    return kwargs
+
+
+def _result_cache_key(model: str, resume_text: str, job_description: str, strategy: str | None, *variant: str) -> str:
+    # variant distinguishes other ways of producing a result (split mode, single sections)
+    return make_cache_key(
+        PROMPT_VERSION,
+        model,
+        settings.openai_temperature,
+        settings.openai_max_output_tokens,
+        strategy or "default",
+        normalize_text(resume_text),
+        normalize_text(job_description),
+        *variant,
     )
 
-    is_gpt5 = model.lower().startswith("gpt-5")
 
-    if is_gpt5:
-        # Prefer Responses API for gpt-5 models
-        input_text = f"System: {system_prompt}\n\nUser: {user_prompt}"
-        response = client.responses.create(
-            model=model,
-            input=input_text,
-            max_output_tokens=settings.openai_max_output_tokens,
+def _record_response(tier: str, model: str, response) -> None:
+    LLM_REQUESTS.inc(tier, model)
+    record_usage(tier, model, getattr(response, "usage", None))
+
+
+async def _generate(
+    target: Target,
+    system_prompt: str,
+    user_prompt: str,
+    budget: int,
+    max_output_tokens: Optional[int] = None,
+    structured: bool = False,
+) -> Optional[str]:
+    # Upstream calls go through the tier's rate limiter, retry policy and circuit breaker
+    client, model, tier = target.client, target.model, target.tier
+    chat_kwargs = _chat_kwargs(model, system_prompt, user_prompt, max_output_tokens, structured)
+    with stage("llm"):
+        if _is_gpt5(model):
+            # Prefer Responses API for gpt-5 models
+            responses_kwargs = _responses_kwargs(model, system_prompt, user_prompt, max_output_tokens, structured)
+            response = await call_llm(tier, budget, lambda: client.responses.create(**responses_kwargs))
+            _record_response(tier, model, response)
+            content = _extract_text_from_response(response)
+            if not content and settings.openai_gpt5_chat_fallback:
+                # Fallback to Chat Completions; this is a second billed call
+                logger.warning("Responses API returned no text for %s; falling back to Chat Completions", model)
+                response = await call_llm(tier, budget, lambda: client.chat.completions.create(**chat_kwargs))
+                _record_response(tier, model, response)
+                content = _extract_text_from_response(response)
+        else:
+            # Use Chat Completions for other models
+            response = await call_llm(tier, budget, lambda: client.chat.completions.create(**chat_kwargs))
+            _record_response(tier, model, response)
+            content = _extract_text_from_response(response)
+    return content
+
+
+async def _cached_generate(
+    route: Route,
+    cache_key: Callable[[str], str],
+    build: Callable[[], Awaitable[Tuple[str, str]]],
+) -> Tuple[str, str]:
+    """Return the cached result, or run build() once for all concurrent callers and cache it.
+
+    Results are cached per model, so cache_key maps a model name to the key.
+    Returns the text and the model that produced it.
+    """
+    model, tier = route.primary.model, route.primary.tier
+    key = cache_key(model)
+    if result_cache is not None:
+        cached = await result_cache.get(key)
+        LLM_CACHE.inc(tier, "miss" if cached is None else "hit")
+        if cached is not None:
+            return cached, model
+
+    async def run() -> Tuple[str, str]:
+        content, served = await build()
+        content = content.strip()
+        # A result merged from several models' output matches no single model's key
+        if result_cache is not None and served in (model, route.fallback and route.fallback.model):
+            await result_cache.set(cache_key(served), content)
+        return content, served
+
+    return await inflight.do(key, run)
+
+
+def _use_split(resume_text: str, split_sections: Optional[bool]) -> bool:
+    if split_sections is None:
+        mode = settings.adapt_split_mode.lower()
+        if mode == "auto":
+            return estimate_tokens(resume_text) >= settings.adapt_split_min_tokens
+        return mode == "always"
+    return split_sections
+
+
+def _served_by(*models: str) -> str:
+    # Several models serve one result when some of its calls were routed to the fallback
+    return ", ".join(dict.fromkeys(models))
+
+
+async def _adapt_by_section(
+    route: Route,
+    resume_text: str,
+    job_description: str,
+    strategy: str | None,
+    consistency_pass: bool,
+) -> Tuple[str, str]:
+    """Adapt each resume section in its own concurrent call, then merge them in the original order.
+
+    Every section gets the full output budget, so long resumes are no longer
+    cut off at openai_max_output_tokens, and sections are cached individually.
+    """
+    preamble, sections = split_resume(resume_text)
+    if len(sections) < 2:
+        # Nothing to split on; a single call is cheaper than one call plus a merge
+        system_prompt, user_prompt = _build_prompts(resume_text, job_description, strategy)
+        return await _generate_text(route, system_prompt, user_prompt)
+
+    async def adapt_section(title: str, section_text: str) -> Tuple[str, str]:
+        system_prompt, user_prompt = _build_section_prompts(section_text, title, job_description, strategy)
+        return await _cached_generate(
+            route,
+            lambda model: _result_cache_key(model, section_text, job_description, strategy, "section", title),
+            lambda: _generate_text(route, system_prompt, user_prompt),
         )
-        content = _extract_text_from_response(response)
+
+    async with asyncio.TaskGroup() as group:
+        # TaskGroup cancels the remaining sections as soon as one fails
+        tasks = [group.create_task(adapt_section(title, text)) for title, text in sections]
+    adapted = [task.result()[0] for task in tasks]
+    models = [task.result()[1] for task in tasks]
+    merged = "\n\n".join(part for part in [preamble, *adapted] if part)
+
+    if consistency_pass:
+        system_prompt, user_prompt = _build_consistency_prompts(merged, job_description)
+        # The whole resume comes back, so size the output budget from the merged text
+        max_output_tokens = max(settings.openai_max_output_tokens, int(estimate_tokens(merged) * 1.25))
+        merged, model = await _generate_text(route, system_prompt, user_prompt, max_output_tokens)
+        models.append(model)
+    return merged, _served_by(*models)
+
+
+async def _generate_text(
+    route: Route,
+    system_prompt: str,
+    user_prompt: str,
+    max_output_tokens: Optional[int] = None,
+    structured: bool = False,
+) -> Tuple[str, str]:
+    """Generate with model routing; returns the text and the model that served it.
+
+    With structured, the text is JSON already validated against StructuredResume.
+    """
+    budget = estimate_tokens(system_prompt, user_prompt) + (max_output_tokens or settings.openai_max_output_tokens)
+
+    async def call(target: Target) -> str:
+        content = await _generate(target, system_prompt, user_prompt, budget, max_output_tokens, structured)
         if not content:
-            # Fallback to Chat Completions without unsupported params
-            response = client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-            )
-            content = _extract_text_from_response(response)
-    else:
-        # Use Chat Completions for other models
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            max_tokens=settings.openai_max_output_tokens,
-            temperature=settings.openai_temperature,
+            raise RuntimeError("OpenAI returned no content")
+        if structured:
+            _parse_structured(content)
+        return content
+
+    content, target = await run_routed(route, budget, call)
+    return content, target.model
+
+
+def _parse_structured(content: str) -> StructuredResume:
+    try:
+        return StructuredResume.model_validate_json(content)
+    except ValueError as exc:
+        raise RuntimeError(f"OpenAI returned invalid structured output: {exc}") from exc
+
+
+class Adaptation(NamedTuple):
+    text: str
+    # Model that produced the text; several, comma-separated, when calls were routed to different models
+    model: str
+    # Validated sections (with content ids) when the output format was "json"
+    sections: Optional[List[ParsedSection]] = None
+
+
+def _structured_adaptation(content: str, model: str) -> Adaptation:
+    sections = [
+        cache_section([block.model_dump() for block in section.blocks])
+        for section in _parse_structured(content).sections
+    ]
+    # Plain text in the usual markup, for clients that only read adapted_resume
+    text = "\n\n".join(section_to_text(section) for section in sections)
+    return Adaptation(text, model, sections)
+
+
+async def adapt_resume(
+    resume_text: str,
+    job_description: str,
+    strategy: str | None = None,
+    request: Optional[Request] = None,
+    split_sections: Optional[bool] = None,
+    consistency_pass: Optional[bool] = None,
+    authenticated: Optional[bool] = None,
+    output_format: Optional[str] = None,
+) -> Adaptation:
+    """Adapt a resume to a job description.
+
+    split_sections, consistency_pass and output_format override the server
+    defaults (CV_ADAPTER_ADAPT_SPLIT_MODE, CV_ADAPTER_ADAPT_CONSISTENCY_PASS,
+    CV_ADAPTER_ADAPT_OUTPUT_FORMAT). authenticated overrides the session check
+    on request, for work that outlives its request (background jobs).
+    """
+    route = _get_route(request, authenticated)
+    with stage("prompt"):
+        resume_text, job_description = compact_inputs(resume_text, job_description, route.primary.model)
+
+    if (output_format or settings.adapt_output_format).lower() == "json":
+        # One call: the model returns the whole resume as sections, so there is nothing to split or merge
+        system_prompt, user_prompt = _build_prompts(resume_text, job_description, strategy, structured=True)
+        content, model = await _cached_generate(
+            route,
+            lambda model: _result_cache_key(model, resume_text, job_description, strategy, "json"),
+            lambda: _generate_text(route, system_prompt, user_prompt, structured=True),
         )
-        content = _extract_text_from_response(response)
+        return _structured_adaptation(content, model)
+
+    if _use_split(resume_text, split_sections):
+        if consistency_pass is None:
+            consistency_pass = settings.adapt_consistency_pass
+        variant = ("split", "consistent" if consistency_pass else "merged")
+        return Adaptation(*await _cached_generate(
+            route,
+            lambda model: _result_cache_key(model, resume_text, job_description, strategy, *variant),
+            lambda: _adapt_by_section(route, resume_text, job_description, strategy, consistency_pass),
+        ))
+
+    system_prompt, user_prompt = _build_prompts(resume_text, job_description, strategy)
+    return Adaptation(*await _cached_generate(
+        route,
+        lambda model: _result_cache_key(model, resume_text, job_description, strategy),
+        lambda: _generate_text(route, system_prompt, user_prompt),
+    ))
+
+
+async def _iter_stream_text(stream, tier: str, model: str) -> AsyncIterator[str]:
+    # Always release the upstream connection, including when the consumer is cancelled
+    LLM_REQUESTS.inc(tier, model)
+    try:
+        async for event in stream:
+            delta = _extract_text_from_stream_event(event)
+            if delta:
+                yield delta
+                continue
+            # Usage arrives once per stream: a final chat chunk or the response.completed event
+            usage = getattr(event, "usage", None) or getattr(getattr(event, "response", None), "usage", None)
+            if usage is not None:
+                record_usage(tier, model, usage)
+    finally:
+        await stream.close()
+
+
+async def _open_stream(target: Target, system_prompt: str, user_prompt: str, budget: int, chat: bool):
+    client, model, tier = target.client, target.model, target.tier
+    if chat:
+        chat_kwargs = _chat_kwargs(model, system_prompt, user_prompt)
+        return await call_llm(
+            tier,
+            budget,
+            lambda: client.chat.completions.create(stream=True, stream_options={"include_usage": True}, **chat_kwargs),
+        )
+    responses_kwargs = _responses_kwargs(model, system_prompt, user_prompt)
+    return await call_llm(tier, budget, lambda: client.responses.create(stream=True, **responses_kwargs))
+
+
+async def stream_adapt_resume(
+    resume_text: str,
+    job_description: str,
+    strategy: str | None = None,
+    request: Optional[Request] = None,
+    on_model: Optional[Callable[[str], None]] = None,
+) -> AsyncIterator[str]:
+    """Streaming variant of adapt_resume that yields text deltas as they arrive.
+
+    Closing the generator (e.g. when the client disconnects) closes the
+    upstream stream, which cancels the in-flight OpenAI request. on_model is
+    called with the serving model before the first delta. Streams are routed
+    like other calls, except that they are never hedged and only fall back to
+    another model while opening.
+    """
+    route = _get_route(request)
+    with stage("prompt"):
+        resume_text, job_description = compact_inputs(resume_text, job_description, route.primary.model)
+
+    cache_key = _result_cache_key(route.primary.model, resume_text, job_description, strategy)
+    if result_cache is not None:
+        cached = await result_cache.get(cache_key)
+        LLM_CACHE.inc(route.primary.tier, "miss" if cached is None else "hit")
+        if cached is not None:
+            if on_model is not None:
+                on_model(route.primary.model)
+            yield cached
+            return
+
+    system_prompt, user_prompt = _build_prompts(resume_text, job_description, strategy)
+    budget = estimate_tokens(system_prompt, user_prompt) + settings.openai_max_output_tokens
+    route = plan(route, budget)
+    target = route.primary
+
+    # Only opening the stream is retried; once tokens flow, errors are passed to the client
+    # The llm stage covers the whole stream, including time the client takes to read it
+    chunks: list[str] = []
+    with stage("llm"):
+        try:
+            stream = await _open_stream(target, system_prompt, user_prompt, budget, chat=not _is_gpt5(target.model))
+        except UpstreamUnavailableError:
+            if route.fallback is None:
+                raise
+            ROUTED.inc(target.model, route.fallback.model, "unavailable")
+            target = route.fallback
+            stream = await _open_stream(target, system_prompt, user_prompt, budget, chat=not _is_gpt5(target.model))
+        if on_model is not None:
+            on_model(target.model)
+        with track_in_flight(target.model):
+            async for delta in _iter_stream_text(stream, target.tier, target.model):
+                chunks.append(delta)
+                yield delta
+            if not chunks and _is_gpt5(target.model) and settings.openai_gpt5_chat_fallback:
+                stream = await _open_stream(target, system_prompt, user_prompt, budget, chat=True)
+                async for delta in _iter_stream_text(stream, target.tier, target.model):
+                    chunks.append(delta)
+                    yield delta
 
+    content = "".join(chunks).strip()
     if not content:
         raise RuntimeError("OpenAI returned no content")
-    return content.strip() 
\ No newline at end of file
+    # Only completed streams reach this point, so partial output is never cached
+    if result_cache is not None:
+        await result_cache.set(_result_cache_key(target.model, resume_text, job_description, strategy), content)
@@ -0,0 +1,271 @@
+"""In-process metrics with Prometheus text exposition.
+
+Deliberately tiny: counters, histograms and callback gauges keyed by label
+values, cheap enough to sit on the hot path. Stage timings recorded with
+`stage()` also feed the per-request Server-Timing header when enabled.
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Stage latencies range from sub-millisecond parses to minute-long LLM calls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0.0)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last one is +Inf), sum]
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(counts), total[0]) for key, (counts, total) in self._values.items()]
+        lines: List[str] = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class CallbackMetric:
+    """Metric whose samples are read from `fn` at scrape time, as (label values, value) pairs.
+
+    Used to expose numbers other components already keep (cache sizes, hit
+    counts, breaker state) without touching their hot paths.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str],
+        fn: Callable[[], Iterable[Tuple[Sequence[str], float]]],
+        kind: str = "gauge",
+    ) -> None:
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.fn = fn
+
+    def collect(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in self.fn()]
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def callback(self, name: str, help: str, labels: Sequence[str], fn, kind: str = "gauge") -> CallbackMetric:
+        return self.register(CallbackMetric(name, help, labels, fn, kind))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "cv_adapter_http_request_duration_seconds",
+    "Time to produce the response headers, by route",
+    ("method", "route", "status"),
+)
+STAGE_SECONDS = registry.histogram(
+    "cv_adapter_stage_duration_seconds",
+    "Time spent per pipeline stage (extract, prompt, llm, parse, render)",
+    ("stage",),
+)
+LLM_REQUESTS = registry.counter("cv_adapter_llm_requests_total", "Upstream LLM calls that returned a result", ("tier", "model"))
+LLM_TOKENS = registry.counter("cv_adapter_llm_tokens_total", "Tokens reported by the LLM backend", ("tier", "model", "kind"))
+LLM_ERRORS = registry.counter("cv_adapter_llm_errors_total", "Failed upstream LLM attempts", ("tier", "error"))
+LLM_CACHE = registry.counter("cv_adapter_llm_cache_total", "Adaptation result cache lookups", ("tier", "result"))
+
+
+# Per-request stage durations (seconds) for the Server-Timing header; None when not collected
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+class stage:
+    """Time a block as one pipeline stage: `with stage("render"): ...`."""
+
+    __slots__ = ("name", "_start")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self) -> "stage":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        record_stage(self.name, time.perf_counter() - self._start)
+
+
+def record_stage(name: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, name)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+def record_usage(tier: str, model: str, usage) -> None:
+    """Count prompt/completion tokens from a Chat Completions or Responses API usage object."""
+    if usage is None:
+        return
+    prompt = getattr(usage, "prompt_tokens", None)
+    if prompt is None:
+        prompt = getattr(usage, "input_tokens", None)
+    completion = getattr(usage, "completion_tokens", None)
+    if completion is None:
+        completion = getattr(usage, "output_tokens", None)
+    if prompt:
+        LLM_TOKENS.inc(tier, model, "prompt", amount=prompt)
+    if completion:
+        LLM_TOKENS.inc(tier, model, "completion", amount=completion)
+
+
+def _server_timing(timings: Dict[str, float]) -> str:
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
+
+
+def _route_label(scope: Scope) -> str:
+    """Template of the matched route including the prefix it is mounted under, e.g. /api/adapt."""
+    # The router stores the matched route in the scope; label by its template to keep cardinality low
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    # Routes of an included router or mount only know their own path: whatever precedes it in the URL is the prefix
+    path = scope["path"]
+    regex = getattr(route, "path_regex", None)
+    start = 0 if regex is not None else -1
+    while start >= 0:
+        if regex.match(path[start:]):
+            return path[:start] + template
+        start = path.find("/", start + 1)
+    return scope.get("root_path", "") + template
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing each request and, if enabled, adding Server-Timing.
+
+    Only stages finished before the response headers go out can be reported in
+    the header; streamed bodies still feed the histograms.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        timings: Optional[Dict[str, float]] = {} if settings.server_timing_header else None
+        token = _request_timings.set(timings)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                elapsed = time.perf_counter() - start
+                route = _route_label(scope)
+                HTTP_REQUEST_SECONDS.observe(elapsed, scope["method"], route, str(message["status"]))
+                if timings is not None:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", _server_timing({**timings, "total": elapsed}))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_timings.reset(token)
@@ -1,40 +1,180 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import mmap
+import os
+import re
+import time
+from dataclasses import dataclass
+from functools import lru_cache
 from io import BytesIO
-from typing import List, TypedDict, Literal
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Iterator, List, Mapping, NotRequired, Optional, TypedDict, Literal, Union
 
-from pypdf import PdfReader
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-from reportlab.lib.units import inch
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, ListFlowable, ListItem, HRFlowable
+from app.core.cache import SizedLRU, make_cache_key
+from app.core.config import settings
 
+# pypdf and reportlab take ~120 ms to import; they are loaded on first use (or by the
+# startup warm-up) so importing this module, e.g. for parse_text_to_sections, stays cheap
+if TYPE_CHECKING:
+	from pypdf import PageObject, PdfReader
+	from reportlab.lib import colors
+	from reportlab.lib.styles import ParagraphStyle
 
-def extract_first_two_pages_text(file_bytes: bytes) -> str:
-	"""Extract text from the first two pages of a PDF.
 
-	If the PDF has fewer than two pages, extract whatever is available.
-	Returns a best-effort plain text string.
+# Extracted text keyed by pdf_handle(), so re-uploads of the same file skip parsing
+pdf_text_cache: SizedLRU[str] = SizedLRU(settings.pdf_text_cache_max_bytes)
+
+# Rendered PDFs keyed by pdf_render_key(); the key doubles as the response ETag
+pdf_render_cache: SizedLRU[bytes] = SizedLRU(settings.pdf_render_cache_max_bytes)
+
+# Structured sections keyed by section_id(), so a re-render can reference unchanged sections
+section_cache: SizedLRU[str] = SizedLRU(settings.section_cache_max_bytes)
+
+# Bump whenever rendering output changes so cached PDFs and ETags are not reused
+RENDER_VERSION = "1"
+
+# Separates pages in extracted text, as in pdftotext output; prompt compaction uses it to find page headers.
+# Internal only: strip_page_breaks() removes it before text is returned to clients or sent uncompacted
+PAGE_BREAK = "\f"
+
+# Points per inch (reportlab.lib.units.inch)
+INCH = 72.0
+
+
+def strip_page_breaks(text: str) -> str:
+	"""Replace PAGE_BREAK separators with a blank line."""
+	return text.replace(f"\n{PAGE_BREAK}\n", "\n\n").replace(PAGE_BREAK, "\n")
+
+
+def load_backends() -> None:
+	"""Import pypdf and reportlab now instead of on the first extraction or render."""
+	import pypdf  # noqa: F401
+	import reportlab.platypus  # noqa: F401
+
+
+def pdf_handle(file_bytes: bytes) -> str:
+	"""Content address of an uploaded PDF (SHA-256 of its bytes)."""
+	return hashlib.sha256(file_bytes).hexdigest()
+
+
+@dataclass
+class ExtractedText:
+	# Pages are separated by PAGE_BREAK lines
+	text: str
+	page_count: int
+	pages_read: int
+	# Wall time per page read, in milliseconds
+	page_timings_ms: List[float]
+	# True if not every page was read or the text was cut to the character budget
+	truncated: bool
+
+
+# Page attributes a /Page may inherit from its ancestors in the page tree
+_INHERITABLE_PAGE_KEYS = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+
+
+def _iter_pages(reader: PdfReader) -> Iterator[PageObject]:
+	"""Yield pages in document order, resolving only the tree nodes needed to reach them.
+
+	reader.pages flattens the whole page tree on first access, which for a
+	large portfolio costs more time and memory than reading the two pages we need.
 	"""
-	buffer = BytesIO(file_bytes)
-	reader = PdfReader(buffer)
+	from pypdf import PageObject
+	from pypdf.generic import IndirectObject, NameObject
+
+	pages_ref = reader.trailer["/Root"].raw_get("/Pages")
+	stack = [(pages_ref, {})]
+	seen = set()
+	while stack:
+		ref, inherited = stack.pop()
+		node = ref.get_object()
+		if id(node) in seen:
+			# Malformed tree with a cycle
+			continue
+		seen.add(id(node))
+		if node.get("/Type") == "/Pages" or "/Kids" in node:
+			inherit = dict(inherited)
+			inherit.update({key: node.raw_get(key) for key in _INHERITABLE_PAGE_KEYS if key in node})
+			stack.extend((kid, inherit) for kid in reversed(node["/Kids"]))
+			continue
+		page = PageObject(reader, ref if isinstance(ref, IndirectObject) else None)
+		page.update(node)
+		for key, value in inherited.items():
+			if key not in page:
+				page[NameObject(key)] = value
+		yield page
+
 
-	pages_to_read: List[int] = []
-	if len(reader.pages) > 0:
-		pages_to_read.append(0)
-	if len(reader.pages) > 1:
-		pages_to_read.append(1)
+def _page_count(reader: PdfReader) -> int:
+	count = reader.trailer["/Root"]["/Pages"].get("/Count")
+	return int(count) if count is not None else len(reader.pages)
 
+
+def _extract_from_reader(reader: PdfReader, max_pages: int, max_chars: int) -> ExtractedText:
+	page_count = _page_count(reader)
 	texts: List[str] = []
-	for page_index in pages_to_read:
-		page = reader.pages[page_index]
-		text = page.extract_text() or ""
-		texts.append(text.strip())
+	timings: List[float] = []
+	chars = 0
+	for page in _iter_pages(reader):
+		if max_pages > 0 and len(timings) >= max_pages:
+			break
+		start = time.perf_counter()
+		text = (page.extract_text() or "").strip()
+		timings.append(round((time.perf_counter() - start) * 1000, 2))
+		if text:
+			texts.append(text)
+			chars += len(text)
+		if max_chars > 0 and chars >= max_chars:
+			# Enough text for a resume; don't pay for parsing the rest of a long portfolio
+			break
+
+	joined = f"\n{PAGE_BREAK}\n".join(texts)
+	truncated = len(timings) < page_count
+	if max_chars > 0 and len(joined) > max_chars:
+		joined = joined[:max_chars]
+		truncated = True
+	return ExtractedText(joined, page_count, len(timings), timings, truncated)
+
+
+def extract_pdf_text(source: Union[bytes, str, os.PathLike], max_pages: int = 2, max_chars: int = 0) -> ExtractedText:
+	"""Extract text from up to max_pages pages, stopping once max_chars characters are gathered.
+
+	source is the PDF content or a path to it. Files are memory-mapped, so pages
+	are only paged in as pypdf reads them instead of the whole upload being
+	copied into the worker. 0 disables either budget.
+	"""
+	from pypdf import PdfReader
+
+	if isinstance(source, bytes):
+		return _extract_from_reader(PdfReader(BytesIO(source)), max_pages, max_chars)
+	with open(source, "rb") as fh:
+		if os.fstat(fh.fileno()).st_size == 0:
+			# mmap rejects empty files; let pypdf raise its usual error
+			return _extract_from_reader(PdfReader(fh), max_pages, max_chars)
+		with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+			return _extract_from_reader(PdfReader(mapped), max_pages, max_chars)
+
+
+def pdf_render_key(content: Union[str, List[ParsedSection]], title: str, theme_name: str) -> str:
+	"""Content address of a rendered PDF, computed from its inputs so it is known before rendering.
+
+	content is the resume text or its structured sections; sections are keyed by
+	their ids, so their blocks are not hashed again.
+	"""
+	if isinstance(content, str):
+		return make_cache_key("pdf", RENDER_VERSION, theme_name, title, content)
+	return make_cache_key("pdf", RENDER_VERSION, theme_name, title, "sections", [section_id(s) for s in content])
+
+
+def extract_first_two_pages_text(file_bytes: bytes) -> str:
+	"""Extract text from the first two pages of a PDF.
 
-	return "\n\n".join([t for t in texts if t])
+	If the PDF has fewer than two pages, extract whatever is available.
+	Returns a best-effort plain text string.
+	"""
+	return extract_pdf_text(file_bytes, max_pages=2).text
 
 
 # --- PDF rendering ---
@@ -47,87 +187,196 @@ class ParsedBlock(TypedDict, total=False):
 
 class ParsedSection(TypedDict):
 	blocks: List[ParsedBlock]
+	# Content id from section_id(), for sections that came from structured output
+	id: NotRequired[str]
+
+
+def section_id(section: ParsedSection) -> str:
+	"""Content address of a section's blocks."""
+	if 'id' in section:
+		return section['id']
+	return make_cache_key("section", section['blocks'])[:24]
+
+
+def cache_section(blocks: List[ParsedBlock]) -> ParsedSection:
+	"""Build a section with its content id and remember it for get_cached_section()."""
+	section: ParsedSection = {'blocks': blocks}
+	section['id'] = section_id(section)
+	section_cache.set(section['id'], json.dumps(blocks, ensure_ascii=False))
+	return section
+
+
+def get_cached_section(sid: str) -> Optional[ParsedSection]:
+	blocks = section_cache.get(sid)
+	if blocks is None:
+		return None
+	return {'blocks': json.loads(blocks), 'id': sid}
+
+
+_BOLD_RE = re.compile(r"\*\*([^*]+)\*\*")
+_ITALIC_RE = re.compile(r"\*([^*]+)\*")
 
 
-def _register_base_fonts() -> None:
+def _render_inline(text: str) -> str:
+	# Basic markdown-like conversion for **bold** and *italic*
+	# ReportLab uses <b></b> and <i></i> in its mini markup
+	out = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+	if '*' not in out:
+		return out
+	out = _BOLD_RE.sub(r"<b>\1</b>", out)
+	return _ITALIC_RE.sub(r"<i>\1</i>", out)
+
+
+@lru_cache(maxsize=None)
+def _register_base_fonts() -> Optional[str]:
+	"""Register optional TTF fonts once per process; returns the family name if available."""
+	from reportlab.lib.fonts import addMapping
+	from reportlab.pdfbase import pdfmetrics
+	from reportlab.pdfbase.ttfonts import TTFont
+
 	# Use built-in Helvetica stack to avoid bundling fonts; register for bold/italic variants
 	try:
 		pdfmetrics.registerFont(TTFont('Inter', 'Inter.ttf'))  # optional if available
 	except Exception:
 		# Fallback to Helvetica family present in most PDF readers
-		pass
+		return None
+	# Only the regular face is bundled; map <b>/<i> markup onto Helvetica
+	addMapping('Inter', 0, 0, 'Inter')
+	addMapping('Inter', 1, 0, 'Helvetica-Bold')
+	addMapping('Inter', 0, 1, 'Helvetica-Oblique')
+	addMapping('Inter', 1, 1, 'Helvetica-BoldOblique')
+	return 'Inter'
+
+
+@dataclass(frozen=True)
+class PdfTheme:
+	"""Immutable set of styles for one CV look; built once per process and shared by renders."""
+	name: str
+	title: ParagraphStyle
+	heading: ParagraphStyle
+	subheading: ParagraphStyle
+	meta: ParagraphStyle
+	body: ParagraphStyle
+	rule_color: colors.Color
+	margin: float = 0.8 * INCH
+	section_gap: float = 6
+	list_indent: float = 12
+
+
+def _build_theme(
+	name: str,
+	*,
+	body_font: str = 'Helvetica',
+	ink: str = '#0f172a',
+	accent: str = '#0f172a',
+	muted: str = '#64748b',
+	subtle: str = '#334155',
+	rule: str = '#dbe7ff',
+	scale: float = 1.0,
+	margin: float = 0.8 * INCH,
+	section_gap: float = 6,
+) -> PdfTheme:
+	from reportlab.lib import colors
+	from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+
+	base = getSampleStyleSheet()
+	return PdfTheme(
+		name=name,
+		title=ParagraphStyle(name=f'{name}-CVTitle', parent=base['Heading1'], fontName='Helvetica-Bold', fontSize=18 * scale, leading=22 * scale, spaceAfter=8 * scale, textColor=colors.HexColor(ink)),
+		heading=ParagraphStyle(name=f'{name}-SectionHeading', parent=base['Heading2'], fontName='Helvetica-Bold', fontSize=12 * scale, leading=18 * scale, spaceBefore=10 * scale, spaceAfter=4 * scale, textColor=colors.HexColor(accent)),
+		subheading=ParagraphStyle(name=f'{name}-Subheading', parent=base['Normal'], fontName='Helvetica-Oblique', fontSize=10.5 * scale, leading=12 * scale, textColor=colors.HexColor(subtle)),
+		meta=ParagraphStyle(name=f'{name}-Meta', parent=base['Normal'], fontName=body_font, fontSize=9.5 * scale, leading=12 * scale, textColor=colors.HexColor(muted)),
+		body=ParagraphStyle(name=f'{name}-Body', parent=base['Normal'], fontName=body_font, fontSize=10.5 * scale, leading=14 * scale),
+		rule_color=colors.HexColor(rule),
+		margin=margin,
+		section_gap=section_gap,
+	)
 
 
-def render_cv_pdf_from_sections(sections: List[ParsedSection], title: str = "Curriculum Vitae") -> bytes:
+@lru_cache(maxsize=None)
+def get_themes() -> Mapping[str, PdfTheme]:
+	"""All themes by name, built once per process on first use."""
+	body_font = _register_base_fonts() or 'Helvetica'
+	themes = [
+		_build_theme('classic'),
+		_build_theme('modern', body_font=body_font, accent='#1d4ed8', rule='#1d4ed8', subtle='#1e3a8a'),
+		_build_theme('compact', scale=0.9, margin=0.6 * INCH, section_gap=3),
+	]
+	return MappingProxyType({theme.name: theme for theme in themes})
+
+
+DEFAULT_THEME = 'classic'
+
+
+def get_theme(name: Optional[str]) -> PdfTheme:
+	"""Look up a theme by name (None selects the default); raises ValueError if unknown."""
+	themes = get_themes()
+	theme = themes.get(name or DEFAULT_THEME)
+	if theme is None:
+		raise ValueError(f"Unknown theme {name!r}. Available: {', '.join(sorted(themes))}")
+	return theme
+
+
+def render_cv_pdf_from_sections(
+	sections: List[ParsedSection],
+	title: str = "Curriculum Vitae",
+	theme: Union[str, PdfTheme, None] = None,
+) -> bytes:
+	from reportlab.lib.pagesizes import letter
+	from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, ListFlowable, ListItem, HRFlowable
+
+	# Theme names are accepted so callers in other processes don't pickle style objects
+	styles = theme if isinstance(theme, PdfTheme) else get_theme(theme)
+
 	buffer = BytesIO()
 	_doc = SimpleDocTemplate(
 		buffer,
 		pagesize=letter,
-		leftMargin=0.8 * inch,
-		rightMargin=0.8 * inch,
-		topMargin=0.8 * inch,
-		bottomMargin=0.8 * inch,
+		leftMargin=styles.margin,
+		rightMargin=styles.margin,
+		topMargin=styles.margin,
+		bottomMargin=styles.margin,
 	)
 
-	styles = getSampleStyleSheet()
-	# Base styles
-	styles.add(ParagraphStyle(name='CVTitle', parent=styles['Heading1'], fontName='Helvetica-Bold', fontSize=18, spaceAfter=8, textColor=colors.HexColor('#0f172a')))
-	styles.add(ParagraphStyle(name='SectionHeading', parent=styles['Heading2'], fontName='Helvetica-Bold', fontSize=12, spaceBefore=10, spaceAfter=4, textColor=colors.HexColor('#0f172a')))
-	styles.add(ParagraphStyle(name='Subheading', parent=styles['Normal'], fontName='Helvetica-Oblique', fontSize=10.5, textColor=colors.HexColor('#334155')))
-	styles.add(ParagraphStyle(name='Meta', parent=styles['Normal'], fontName='Helvetica', fontSize=9.5, textColor=colors.HexColor('#64748b')))
-	styles.add(ParagraphStyle(name='Body', parent=styles['Normal'], fontName='Helvetica', fontSize=10.5, leading=14))
-	bullet_style = ParagraphStyle(name='Bullet', parent=styles['Body'], leftIndent=12)
-
 	story: List[object] = []
 
 	# Title
-	story.append(Paragraph(title, styles['CVTitle']))
-	story.append(HRFlowable(width='100%', thickness=1, color=colors.HexColor('#dbe7ff')))
+	story.append(Paragraph(title, styles.title))
+	story.append(HRFlowable(width='100%', thickness=1, color=styles.rule_color))
 	story.append(Spacer(1, 8))
 
-	def _render_inline(text: str) -> str:
-		# Basic markdown-like conversion for **bold** and *italic*
-		# ReportLab uses <b></b> and <i></i> in its mini markup
-		out = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-		# bold
-		import re
-		out = re.sub(r"\*\*([^*]+)\*\*", r"<b>\1</b>", out)
-		# italic
-		out = re.sub(r"\*([^*]+)\*", r"<i>\1</i>", out)
-		return out
-
 	for section in sections:
 		for block in section.get('blocks', []):
 			btype: BlockType = block.get('type', 'paragraph')  # type: ignore
 			if btype == 'heading':
 				text = _render_inline((block.get('text') or '').strip())
 				if text:
-					story.append(Spacer(1, 6))
-					story.append(Paragraph(text, styles['SectionHeading']))
+					story.append(Spacer(1, styles.section_gap))
+					story.append(Paragraph(text, styles.heading))
 			elif btype == 'subheading':
 				text = _render_inline((block.get('text') or '').strip())
 				if text:
-					story.append(Paragraph(text, styles['Subheading']))
+					story.append(Paragraph(text, styles.subheading))
 			elif btype == 'meta':
 				text = _render_inline((block.get('text') or '').strip())
 				if text:
-					story.append(Paragraph(text, styles['Meta']))
+					story.append(Paragraph(text, styles.meta))
 			elif btype == 'paragraph':
 				text = _render_inline((block.get('text') or '').strip())
 				if text:
-					story.append(Paragraph(text, styles['Body']))
+					story.append(Paragraph(text, styles.body))
 			elif btype == 'list':
 				items = block.get('items') or []
 				if items:
 					lf = ListFlowable(
-						[ListItem(Paragraph(_render_inline(it), styles['Body'])) for it in items],
+						[ListItem(Paragraph(_render_inline(it), styles.body)) for it in items],
 						bulletType='bullet',
 						start='•',
-						leftIndent=12,
+						leftIndent=styles.list_indent,
 					)
 					story.append(lf)
 		# space between sections
-		story.append(Spacer(1, 6))
+		story.append(Spacer(1, styles.section_gap))
 
 	_doc.build(story)
 	pdf_bytes = buffer.getvalue()
@@ -135,54 +384,70 @@ def render_cv_pdf_from_sections(sections: List[ParsedSection], title: str = "Cur
 	return pdf_bytes
 
 
+# One anchored pattern classifies a line; alternatives are tried in priority order:
+# **heading**, *subheading*, a line containing a date range (meta), then "- bullet".
+_LINE_RE = re.compile(
+	r'^(?:'
+	r'\*\*(?P<heading>[^*]+)\*\*$'
+	r'|\*(?P<subheading>[^*]+)\*$'
+	# "\d{4}\s*[–-]" is common to both date forms and rejects most lines cheaply
+	r'|(?P<meta>)(?=.*?\d{4}\s*[–-])(?=.*?(?:\b\d{4}\b\s*[–-]\s*(?:\b\d{4}\b|Present)|[A-Za-z]{3,9}\s+\d{4}\s*[–-]\s*(?:[A-Za-z]{3,9}\s+)?(?:\d{4}|Present)))'
+	r'|[-•]\s+(?P<bullet>.*)'
+	r')',
+	re.I,
+)
+_HEADING_PREFIX_RE = re.compile(r'^##\s+')
+
+
 def parse_text_to_sections(text: str) -> List[ParsedSection]:
 	"""Mirror the frontend parsing to keep formatting consistent for PDF."""
-	lines = [ln.strip() for ln in text.splitlines()]
 	sections: List[ParsedSection] = []
-	current: ParsedSection | None = None
-
-	import re
-	def start_section() -> None:
-		nonlocal current
-		if current is None:
-			current = {'blocks': []}
-
-	def push_section_if_not_empty() -> None:
-		nonlocal current
-		if current and current['blocks']:
-			sections.append(current)
-			current = None
-
-	is_bold_heading = lambda line: re.match(r'^(?:##\s+|\*\*[^*]+\*\*)$', line) is not None
-	extract_heading_text = lambda line: re.sub(r'^##\s+', '', re.sub(r'^\*\*|\*\*$', '', line))
-	is_italic_solo = lambda line: re.match(r'^\*[^*]+\*$', line) is not None
-	extract_italic_text = lambda line: re.sub(r'^\*|\*$', '', line)
-	is_meta_date = lambda line: re.search(r'(\b\d{4}\b\s*[–-]\s*(?:\b\d{4}\b|Present))|([A-Za-z]{3,9}\s+\d{4}\s*[–-]\s*(?:[A-Za-z]{3,9}\s+)?(?:\d{4}|Present))', line, re.I) is not None
-	is_bullet = lambda line: re.match(r'^[-•]\s+', line) is not None
-
-	for raw in lines:
+	blocks: List[ParsedBlock] = []
+	last_list: List[str] | None = None
+	match_line = _LINE_RE.match
+
+	for line in text.splitlines():
+		raw = line.strip()
 		if not raw:
 			continue
-		if is_bold_heading(raw):
-			push_section_if_not_empty()
-			current = {'blocks': [{'type': 'heading', 'text': extract_heading_text(raw)}]}
-			continue
-		if current is None:
-			start_section()
-		if is_italic_solo(raw):
-			current['blocks'].append({'type': 'subheading', 'text': extract_italic_text(raw)})
-			continue
-		if is_meta_date(raw):
-			current['blocks'].append({'type': 'meta', 'text': raw})
-			continue
-		if is_bullet(raw):
-			item_text = re.sub(r'^[-•]\s+', '', raw)
-			if current['blocks'] and current['blocks'][-1]['type'] == 'list':
-				current['blocks'][-1]['items'].append(item_text)  # type: ignore
+		m = match_line(raw)
+		kind = m.lastgroup if m else None
+		if kind == 'heading':
+			if blocks:
+				sections.append({'blocks': blocks})
+			blocks = [{'type': 'heading', 'text': _HEADING_PREFIX_RE.sub('', m.group('heading'))}]
+			last_list = None
+		elif kind == 'bullet':
+			if last_list is not None:
+				last_list.append(m.group('bullet'))
 			else:
-				current['blocks'].append({'type': 'list', 'items': [item_text]})
-			continue
-		current['blocks'].append({'type': 'paragraph', 'text': raw})
+				last_list = [m.group('bullet')]
+				blocks.append({'type': 'list', 'items': last_list})
+		else:
+			if kind == 'subheading':
+				blocks.append({'type': 'subheading', 'text': m.group('subheading')})
+			elif kind == 'meta':
+				blocks.append({'type': 'meta', 'text': raw})
+			else:
+				blocks.append({'type': 'paragraph', 'text': raw})
+			last_list = None
+
+	if blocks:
+		sections.append({'blocks': blocks})
+	return sections if sections else [{'blocks': [{'type': 'paragraph', 'text': text}]}]
+
 
-	push_section_if_not_empty()
-	return sections if sections else [{'blocks': [{'type': 'paragraph', 'text': text}]}] 
\ No newline at end of file
+def section_to_text(section: ParsedSection) -> str:
+	"""Inverse of parse_text_to_sections for one section, in the same lightweight markup."""
+	lines: List[str] = []
+	for block in section['blocks']:
+		kind = block.get('type')
+		if kind == 'heading':
+			lines.append(f"**{block.get('text', '')}**")
+		elif kind == 'subheading':
+			lines.append(f"*{block.get('text', '')}*")
+		elif kind == 'list':
+			lines.extend(f"- {item}" for item in block.get('items', []))
+		else:
+			lines.append(block.get('text', ''))
+	return '\n'.join(lines)
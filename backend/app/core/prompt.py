@@ -0,0 +1,218 @@
+"""Input preprocessing for the adaptation prompt.
+
+Resumes come from pypdf with broken whitespace, hyphenated line breaks and
+repeated page headers; job postings carry EEO statements, benefits blurbs and
+other boilerplate. Both are cleaned up and capped to a token budget before
+they are pasted into the prompt, since prompt tokens drive latency and cost.
+"""
+from __future__ import annotations
+
+import re
+from typing import List, Tuple
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.pdf import PAGE_BREAK, parse_text_to_sections, section_to_text, strip_page_breaks
+from app.core.resilience import estimate_tokens
+
+
+# Context window (tokens) by model prefix; the first matching prefix wins
+MODEL_CONTEXT_TOKENS = (
+    ("gpt-5", 400_000),
+    ("gpt-4.1", 1_000_000),
+    ("gpt-4o", 128_000),
+    ("gpt-4-turbo", 128_000),
+    ("gpt-4", 8_192),
+    ("gpt-3.5-turbo", 16_385),
+)
+DEFAULT_CONTEXT_TOKENS = 16_385
+
+# Room kept for the system prompt, the fixed instructions and the strategy line
+PROMPT_OVERHEAD_TOKENS = 400
+
+# Share of the input budget given to the resume when both inputs need trimming
+RESUME_BUDGET_SHARE = 0.6
+
+PROMPT_TOKENS_SAVED = registry.counter(
+    "cv_adapter_prompt_tokens_saved_total",
+    "Estimated prompt tokens removed by compaction",
+    ("input",),
+)
+
+_SPACE_RE = re.compile(r"[ \t\f\v\u00a0\u2000-\u200b]+")
+_HYPHEN_BREAK_RE = re.compile(r"([a-z])[-\u00ad]\n([a-z])")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+|\n")
+_PAGE_MARKER_RE = re.compile(r"^(?:page\s+\d+(?:\s*(?:of|/)\s*\d+)?|\d+\s*/\s*\d+|-\s*\d+\s*-)$", re.I)
+_BOILERPLATE_RE = re.compile(
+    r"equal (?:employment )?opportunity|\beeo\b|affirmative action|"
+    r"without regard to (?:race|colou?r|religion|creed|sex|gender|age|national origin|disability|veteran)|"
+    r"reasonable accommodation|protected veteran|e-verify|pay transparency|"
+    r"privacy (?:notice|policy)|recruitment agencies|unsolicited (?:resumes|applications)|"
+    r"\b401\(?k\)?|paid time off|\bpto\b|(?:medical|health), dental|"
+    r"(?:our )?benefits (?:include|package)|perks include",
+    re.I,
+)
+
+# Plain-text section titles as they appear in extracted resumes ("EXPERIENCE", "Work history:")
+_PLAIN_HEADING_RE = re.compile(
+    r"^(?:(?:professional |work |relevant )?(?:summary|profile|experience|employment history|work history)"
+    r"|(?:technical |core )?(?:skills|competencies)|education|projects|certifications?|publications"
+    r"|awards|achievements|languages|interests|hobbies|volunteering|volunteer experience|references"
+    r"|(?:career )?objective|training|courses)\s*:?$",
+    re.I,
+)
+
+# Lines shorter than this (section titles, single skills) may legitimately repeat
+_MIN_DEDUPE_CHARS = 12
+
+# Page headers and footers are among the first and last lines of a page
+_PAGE_EDGE_LINES = 2
+
+
+def normalize(text: str) -> str:
+    """Collapse runs of spaces, join hyphenated line breaks and squeeze blank lines."""
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = "\n".join(_SPACE_RE.sub(" ", line).strip() for line in text.split("\n"))
+    text = _HYPHEN_BREAK_RE.sub(r"\1\2", text)
+    return _BLANK_LINES_RE.sub("\n\n", text).strip()
+
+
+def dedupe_lines(text: str) -> str:
+    """Drop page markers and every repeated line; for job postings, where repeats are noise."""
+    seen = set()
+    kept: List[str] = []
+    for line in text.split("\n"):
+        if _PAGE_MARKER_RE.match(line):
+            continue
+        if len(line) >= _MIN_DEDUPE_CHARS:
+            key = line.casefold()
+            if key in seen:
+                continue
+            seen.add(key)
+        kept.append(line)
+    return _BLANK_LINES_RE.sub("\n\n", "\n".join(kept)).strip()
+
+
+def drop_page_artifacts(text: str) -> str:
+    """Normalize a resume and drop page markers and the headers/footers pypdf emits once per page.
+
+    Only lines at the edge of a page that already appeared at the edge of an
+    earlier page are dropped. Lines repeated elsewhere are real content, e.g.
+    the same job title or bullet under two employers.
+    """
+    seen = set()
+    pages: List[str] = []
+    for page in text.split(PAGE_BREAK):
+        lines = [line for line in normalize(page).split("\n") if not _PAGE_MARKER_RE.match(line)]
+        content = [i for i, line in enumerate(lines) if line]
+        edges = set(content[:_PAGE_EDGE_LINES] + content[-_PAGE_EDGE_LINES:])
+        edge_keys = set()
+        kept: List[str] = []
+        for i, line in enumerate(lines):
+            if i in edges and len(line) >= _MIN_DEDUPE_CHARS:
+                key = line.casefold()
+                if key in seen:
+                    continue
+                edge_keys.add(key)
+            kept.append(line)
+        seen |= edge_keys
+        pages.append("\n".join(kept))
+    return _BLANK_LINES_RE.sub("\n\n", "\n\n".join(pages)).strip()
+
+
+def _is_boilerplate(paragraph: str) -> bool:
+    # Boilerplate must dominate: one benefits phrase in a requirements list doesn't make it boilerplate
+    sentences = [sentence for sentence in _SENTENCE_END_RE.split(paragraph) if sentence.strip()]
+    matching = sum(1 for sentence in sentences if _BOILERPLATE_RE.search(sentence))
+    return matching * 2 > len(sentences)
+
+
+def drop_boilerplate(text: str) -> str:
+    """Remove paragraphs made up mostly of legal/benefits boilerplate from a job posting."""
+    paragraphs = text.split("\n\n")
+    kept = [paragraph for paragraph in paragraphs if not _is_boilerplate(paragraph)]
+    # A posting made only of matching paragraphs is more likely a false positive than pure boilerplate
+    return "\n\n".join(kept) if kept else text
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to roughly max_tokens, at a line boundary where possible."""
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind("\n", 0, max_chars)
+    return text[: cut if cut > max_chars // 2 else max_chars].rstrip()
+
+
+def context_tokens(model: str) -> int:
+    name = model.lower()
+    for prefix, tokens in MODEL_CONTEXT_TOKENS:
+        if name.startswith(prefix):
+            return tokens
+    return DEFAULT_CONTEXT_TOKENS
+
+
+def input_token_budget(model: str) -> int:
+    """Tokens available for resume plus job description in one prompt."""
+    budget = context_tokens(model) - settings.openai_max_output_tokens - PROMPT_OVERHEAD_TOKENS
+    if settings.prompt_max_input_tokens > 0:
+        budget = min(budget, settings.prompt_max_input_tokens)
+    return max(budget, 256)
+
+
+def _split_budget(budget: int, resume_tokens: int, job_tokens: int) -> Tuple[int, int]:
+    # Each input gets its share; whatever one doesn't use goes to the other
+    resume_share = int(budget * RESUME_BUDGET_SHARE)
+    job_share = budget - resume_share
+    if resume_tokens < resume_share:
+        job_share = budget - resume_tokens
+    elif job_tokens < job_share:
+        resume_share = budget - job_tokens
+    return resume_share, job_share
+
+
+def compact_inputs(resume_text: str, job_description: str, model: str) -> Tuple[str, str]:
+    """Return the resume and job description as they should appear in the prompt."""
+    if not settings.prompt_compaction:
+        return strip_page_breaks(resume_text), job_description
+
+    resume = drop_page_artifacts(resume_text)
+    job = drop_boilerplate(dedupe_lines(normalize(job_description)))
+
+    resume_budget, job_budget = _split_budget(input_token_budget(model), estimate_tokens(resume), estimate_tokens(job))
+    resume = truncate_to_tokens(resume, resume_budget)
+    job = truncate_to_tokens(job, job_budget)
+
+    PROMPT_TOKENS_SAVED.inc("resume", amount=max(0, estimate_tokens(resume_text) - estimate_tokens(resume)))
+    PROMPT_TOKENS_SAVED.inc("job_description", amount=max(0, estimate_tokens(job_description) - estimate_tokens(job)))
+    return resume, job
+
+
+def _mark_plain_headings(text: str) -> str:
+    # pypdf output has no markup; turn recognizable section titles into **Title** lines for the parser.
+    # Only known titles: an all-caps name or company line is not a section of its own
+    lines = []
+    for line in text.split("\n"):
+        stripped = line.strip()
+        if stripped and _PLAIN_HEADING_RE.match(stripped):
+            line = f"**{stripped.rstrip(':')}**"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def split_resume(text: str) -> Tuple[str, List[Tuple[str, str]]]:
+    """Split a resume into its preamble (name, contact details) and (title, text) sections.
+
+    The preamble is everything before the first heading and is returned as-is;
+    it is not worth a model call.
+    """
+    preamble = ""
+    sections: List[Tuple[str, str]] = []
+    for section in parse_text_to_sections(_mark_plain_headings(text)):
+        blocks = section["blocks"]
+        if blocks[0].get("type") != "heading":
+            preamble = section_to_text(section)
+            continue
+        sections.append((blocks[0].get("text", ""), section_to_text(section)))
+    return preamble, sections
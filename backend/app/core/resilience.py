@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+from app.core.config import settings
+from app.core.metrics import LLM_ERRORS, registry
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class UpstreamUnavailableError(RuntimeError):
+    """The LLM backend is rate limited or unhealthy; surfaced to clients as 503."""
+
+    def __init__(self, message: str, retry_after: float | None = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Reservation-based token bucket refilled continuously at rate_per_minute.
+
+    reserve() never blocks: it deducts immediately (the balance may go negative)
+    and returns how long the caller must wait, which keeps waiters in FIFO order.
+    """
+
+    def __init__(self, rate_per_minute: float) -> None:
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(rate_per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: float) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= min(amount, self.capacity)
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self, amount: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + min(amount, self.capacity))
+
+
+class RateLimiter:
+    """Requests/min and tokens/min limits for one model tier (0 disables a limit)."""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int) -> None:
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+
+    async def acquire(self, estimated_tokens: int) -> None:
+        wait = 0.0
+        if self.requests is not None:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.reserve(estimated_tokens))
+        if wait > settings.llm_max_queue_wait_seconds:
+            # Too far behind the budget: give the reservation back and shed the request
+            if self.requests is not None:
+                self.requests.refund(1)
+            if self.tokens is not None:
+                self.tokens.refund(estimated_tokens)
+            raise UpstreamUnavailableError("LLM rate limit budget exhausted, try again shortly", retry_after=wait)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class CircuitBreaker:
+    """Opens after consecutive upstream failures; while open, calls fail fast.
+
+    After reset_seconds one probe request is let through (half-open): success
+    closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_seconds:
+            return "open"
+        return "half_open"
+
+    def check(self) -> bool:
+        """Raise if calls should fail fast; returns True if the caller is the half-open probe."""
+        if self.opened_at is None:
+            return False
+        remaining = self.reset_seconds - (time.monotonic() - self.opened_at)
+        if remaining > 0 or self._probing:
+            raise UpstreamUnavailableError("LLM backend is unavailable, try again shortly", retry_after=max(remaining, 1.0))
+        self._probing = True
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self._probing:
+                logger.warning("Opening LLM circuit breaker after %d consecutive failures", self.failures)
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def abandon_probe(self) -> None:
+        # A cancelled probe tells us nothing; let the next call probe instead
+        self._probing = False
+
+
+class TierGuard:
+    def __init__(self) -> None:
+        self.limiter = RateLimiter(settings.llm_requests_per_minute, settings.llm_tokens_per_minute)
+        self.breaker = CircuitBreaker(settings.llm_breaker_failure_threshold, settings.llm_breaker_reset_seconds)
+
+
+_guards: Dict[str, TierGuard] = {}
+
+
+def get_guard(tier: str) -> TierGuard:
+    guard = _guards.get(tier)
+    if guard is None:
+        guard = _guards[tier] = TierGuard()
+    return guard
+
+
+_BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+registry.callback(
+    "cv_adapter_llm_circuit_state",
+    "LLM circuit breaker state per tier (0 closed, 1 half-open, 2 open)",
+    ("tier",),
+    lambda: [((tier,), _BREAKER_STATES[guard.breaker.state]) for tier, guard in list(_guards.items())],
+)
+
+
+def estimate_tokens(*texts: str) -> int:
+    # ~4 characters per token is close enough for budgeting English prompts
+    return sum(len(text) for text in texts) // 4 + 1
+
+
+def is_retryable(exc: BaseException) -> bool:
+    # Only reached after a call failed, by which point the client has imported openai
+    import openai
+
+    if isinstance(exc, (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)):
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code in (408, 409, 429) or exc.status_code >= 500
+    return False
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, parsed.timestamp() - time.time())
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff, never shorter than the server's Retry-After."""
+    delay = random.uniform(0, min(settings.llm_backoff_max, settings.llm_backoff_base * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, settings.llm_backoff_max))
+    return delay
+
+
+async def call_llm(tier: str, estimated_tokens: int, fn: Callable[[], Awaitable[T]]) -> T:
+    """Run one upstream LLM call under the tier's rate limiter, retry policy and circuit breaker."""
+    guard = get_guard(tier)
+    attempts = max(1, settings.llm_max_attempts)
+    for attempt in range(attempts):
+        try:
+            probe = guard.breaker.check()
+        except UpstreamUnavailableError:
+            # Breaker open: fail fast without reaching the upstream
+            LLM_ERRORS.inc(tier, "rejected")
+            raise
+        try:
+            await guard.limiter.acquire(estimated_tokens)
+        except BaseException as exc:
+            # Shed or cancelled before reaching the upstream: a probe that never ran must not keep the breaker half-open
+            if probe:
+                guard.breaker.abandon_probe()
+            if isinstance(exc, UpstreamUnavailableError):
+                LLM_ERRORS.inc(tier, "rejected")
+            raise
+        try:
+            result = await fn()
+        except Exception as exc:
+            LLM_ERRORS.inc(tier, exc.__class__.__name__)
+            if not is_retryable(exc):
+                import openai
+
+                if isinstance(exc, openai.APIStatusError):
+                    # The upstream answered (e.g. 400), so it is healthy
+                    guard.breaker.record_success()
+                else:
+                    guard.breaker.abandon_probe()
+                raise
+            guard.breaker.record_failure()
+            if attempt == attempts - 1:
+                retry_after = guard.breaker.reset_seconds if guard.breaker.state == "open" else retry_after_seconds(exc)
+                raise UpstreamUnavailableError(
+                    f"LLM backend failed after {attempts} attempts: {exc}", retry_after=retry_after or 1.0
+                ) from exc
+            delay = backoff_delay(attempt, retry_after_seconds(exc))
+            logger.info("Retrying LLM call in %.2fs after %s", delay, exc.__class__.__name__)
+            await asyncio.sleep(delay)
+        except BaseException:
+            guard.breaker.abandon_probe()
+            raise
+        else:
+            guard.breaker.record_success()
+            return result
+    raise AssertionError("unreachable")
@@ -0,0 +1,185 @@
+"""Choosing which model serves an LLM call.
+
+Signed-in users are routed to the premium model, everyone else to the fast
+one. Per model we track calls in flight and an exponentially weighted
+latency per 1k tokens, so the latency of a call can be predicted from its
+size. A premium call is sent to the fast model instead when the premium
+model is saturated, when it is predicted to be too slow, or when it turns
+out to be unavailable (circuit open, retries exhausted). A call still running
+after routing_hedge_after_seconds is hedged with a second request and the
+first answer wins, which bounds tail latency during provider slowdowns.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple, TypeVar
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.resilience import UpstreamUnavailableError
+
+
+T = TypeVar("T")
+
+ROUTED = registry.counter(
+    "cv_adapter_llm_routed_total",
+    "LLM calls sent to another model than the requested one, by reason",
+    ("from_model", "to_model", "reason"),
+)
+HEDGES = registry.counter("cv_adapter_llm_hedges_total", "Hedged LLM calls by which request won", ("winner",))
+
+
+@dataclass(frozen=True)
+class Target:
+    client: Any
+    model: str
+    tier: str
+
+
+@dataclass(frozen=True)
+class Route:
+    """Model to use and, for the premium tier, the fast model to fall back to."""
+    primary: Target
+    fallback: Optional[Target] = None
+
+
+class ModelStats:
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.seconds_per_1k_tokens: Optional[float] = None
+        self.updated_at = 0.0
+
+    def observe(self, seconds: float, tokens: int) -> None:
+        rate = seconds / max(tokens, 1) * 1000
+        if self.seconds_per_1k_tokens is None:
+            self.seconds_per_1k_tokens = rate
+        else:
+            self.seconds_per_1k_tokens += 0.3 * (rate - self.seconds_per_1k_tokens)
+        self.updated_at = time.monotonic()
+
+    def predict(self, tokens: int) -> Optional[float]:
+        # Old samples say nothing about now; without fresh ones, send traffic to measure again
+        if self.seconds_per_1k_tokens is None or time.monotonic() - self.updated_at > settings.routing_stats_ttl_seconds:
+            return None
+        return self.seconds_per_1k_tokens * tokens / 1000
+
+
+_stats: Dict[str, ModelStats] = {}
+
+
+def model_stats(model: str) -> ModelStats:
+    stats = _stats.get(model)
+    if stats is None:
+        stats = _stats[model] = ModelStats()
+    return stats
+
+
+registry.callback(
+    "cv_adapter_llm_model_in_flight",
+    "LLM calls in flight per model",
+    ("model",),
+    lambda: [((model,), stats.in_flight) for model, stats in list(_stats.items())],
+)
+registry.callback(
+    "cv_adapter_llm_model_seconds_per_1k_tokens",
+    "Smoothed LLM latency per 1k prompt and output tokens, per model",
+    ("model",),
+    lambda: [((model,), stats.seconds_per_1k_tokens) for model, stats in list(_stats.items()) if stats.seconds_per_1k_tokens is not None],
+)
+
+
+def downgrade_reason(model: str, tokens: int) -> Optional[str]:
+    """Why a call of this size should not go to this (premium) model right now, if it shouldn't."""
+    stats = model_stats(model)
+    if 0 < settings.routing_premium_max_in_flight <= stats.in_flight:
+        return "saturated"
+    predicted = stats.predict(tokens)
+    if settings.routing_premium_max_latency_seconds > 0 and predicted is not None and predicted > settings.routing_premium_max_latency_seconds:
+        return "slow"
+    return None
+
+
+def plan(route: Route, tokens: int) -> Route:
+    """Apply load- and latency-based downgrades; the returned route's primary is the model to try first."""
+    if route.fallback is None:
+        return route
+    reason = downgrade_reason(route.primary.model, tokens)
+    if reason is None:
+        return route
+    ROUTED.inc(route.primary.model, route.fallback.model, reason)
+    return Route(route.fallback)
+
+
+@contextmanager
+def track_in_flight(model: str) -> Iterator[ModelStats]:
+    stats = model_stats(model)
+    stats.in_flight += 1
+    try:
+        yield stats
+    finally:
+        stats.in_flight -= 1
+
+
+async def _timed(target: Target, tokens: int, call: Callable[[Target], Awaitable[T]]) -> T:
+    with track_in_flight(target.model) as stats:
+        start = time.perf_counter()
+        try:
+            result = await call(target)
+        except asyncio.CancelledError:
+            # A call abandoned after this long took at least this long: count it when it raises the estimate,
+            # or when there is no fresh estimate, so a model that always loses the hedge still looks slow
+            elapsed = time.perf_counter() - start
+            predicted = stats.predict(tokens)
+            if predicted is None or elapsed > predicted:
+                stats.observe(elapsed, tokens)
+            raise
+    stats.observe(time.perf_counter() - start, tokens)
+    return result
+
+
+async def _hedged(primary: Target, hedge: Target, tokens: int, call: Callable[[Target], Awaitable[T]]) -> Tuple[T, Target]:
+    if settings.routing_hedge_after_seconds <= 0:
+        # Awaited directly, so the call counts as in flight before any other call is planned
+        return await _timed(primary, tokens, call), primary
+
+    first = asyncio.ensure_future(_timed(primary, tokens, call))
+    tasks: Dict["asyncio.Future[T]", Target] = {first: primary}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=settings.routing_hedge_after_seconds)
+        hedged = not done
+        if hedged:
+            tasks[asyncio.ensure_future(_timed(hedge, tokens, call))] = hedge
+        error: Optional[BaseException] = None
+        while tasks:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                target = tasks.pop(task)
+                if task.exception() is None:
+                    if hedged:
+                        HEDGES.inc("primary" if task is first else "hedge")
+                    return task.result(), target
+                error = error or task.exception()
+        raise error
+    finally:
+        # The loser (or both, if we are cancelled) is cancelled, which aborts its HTTP request
+        for task in tasks:
+            task.cancel()
+
+
+async def run_routed(route: Route, tokens: int, call: Callable[[Target], Awaitable[T]]) -> Tuple[T, Target]:
+    """Run call(target) for the planned route, with hedging and fallback; returns the result and the target that produced it.
+
+    tokens is the estimated size of the call (prompt plus output budget).
+    """
+    route = plan(route, tokens)
+    # Hedge onto the fast model when there is one; a second request to the same model otherwise
+    try:
+        return await _hedged(route.primary, route.fallback or route.primary, tokens, call)
+    except UpstreamUnavailableError:
+        if route.fallback is None:
+            raise
+        ROUTED.inc(route.primary.model, route.fallback.model, "unavailable")
+        return await _timed(route.fallback, tokens, call), route.fallback
@@ -0,0 +1,59 @@
+"""Background warm-up after startup.
+
+Uvicorn binds the port only once the lifespan startup has finished, so on a
+scale-from-zero every second spent there is added to the first response.
+Startup therefore does nothing heavy; this task then loads what requests
+will need while the app is already serving. Anything a request needs before
+the warm-up gets to it is still loaded on first use.
+"""
+from __future__ import annotations
+
+import importlib
+import logging
+import time
+from typing import Optional
+
+from app.core.auth import get_oauth, oauth_configured
+from app.core.config import settings
+from app.core.executor import run_blocking, run_cpu_bound
+from app.core.llm import open_clients
+from app.core.metrics import registry
+from app.core.pdf import get_themes, load_backends
+
+
+logger = logging.getLogger(__name__)
+
+_warmup_seconds: Optional[float] = None
+
+registry.callback(
+    "cv_adapter_startup_warmup_seconds",
+    "Duration of the background warm-up after startup",
+    (),
+    lambda: [((), _warmup_seconds)] if _warmup_seconds is not None else [],
+)
+
+
+def _load_modules() -> None:
+    load_backends()
+    # Registers fonts and builds the stylesheets
+    get_themes()
+    # Imported with the first client otherwise
+    importlib.import_module("openai")
+    if oauth_configured():
+        get_oauth()
+
+
+async def warm_up() -> None:
+    global _warmup_seconds
+    start = time.perf_counter()
+    try:
+        if settings.cpu_pool_workers > 0:
+            # First, since PDF uploads and renders otherwise wait for a worker process to start
+            await run_cpu_bound(load_backends)
+        await run_blocking(_load_modules)
+        open_clients()
+    except Exception:
+        logger.exception("Startup warm-up failed; components will be loaded on first use")
+        return
+    _warmup_seconds = time.perf_counter() - start
+    logger.info("Startup warm-up finished in %.0f ms", _warmup_seconds * 1000)
@@ -1,19 +1,50 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from pathlib import Path
-from typing import Optional
 
-from fastapi import FastAPI, APIRouter, HTTPException, Request
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, APIRouter, Request
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from starlette.middleware.sessions import SessionMiddleware
 
 from app.api.routes import router as api_router
 from app.api.auth_routes import router as auth_router
 from app.core.config import settings
+from app.core.executor import shutdown_executor
+from app.core.frontend import CachedStaticFiles, IndexPage
+from app.core.jobs import JobRejectedError, job_queue
+from app.core.llm import close_clients
+from app.core.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, registry as metrics_registry
+from app.core.resilience import UpstreamUnavailableError
+from app.core.warmup import warm_up
 
 
 STATIC_DIR = Path(__file__).parent / "static"
 
-app = FastAPI(title="CV Adapter API", version="0.1.0")
+index_page = IndexPage(STATIC_DIR / "index.html")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # A few KB, read once instead of on every page load
+    index_page.load()
+    # The port is bound only after startup returns, so the OpenAI clients and other
+    # heavy pieces are prepared in the background (or on first use) instead
+    warmup = asyncio.create_task(warm_up()) if settings.startup_warmup else None
+    job_queue.start()
+    try:
+        yield
+    finally:
+        await job_queue.stop()
+        if warmup is not None:
+            warmup.cancel()
+            with suppress(asyncio.CancelledError):
+                await warmup
+        # Pooled OpenAI clients live for the whole process
+        await close_clients()
+        shutdown_executor()
+
+
+app = FastAPI(title="CV Adapter API", version="0.1.0", lifespan=lifespan)
 
 # Sessions (cookie-based, no DB)
 app.add_middleware(
@@ -25,13 +56,28 @@ app.add_middleware(
     domain=settings.cookie_domain,
 )
 
+# Outermost, so request timings include the session and routing work
+app.add_middleware(MetricsMiddleware)
+
+@app.exception_handler(UpstreamUnavailableError)
+async def upstream_unavailable_handler(request: Request, exc: UpstreamUnavailableError) -> JSONResponse:
+    headers = {"Retry-After": str(max(1, round(exc.retry_after)))} if exc.retry_after else None
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers=headers)
+
+
+@app.exception_handler(JobRejectedError)
+async def job_rejected_handler(request: Request, exc: JobRejectedError) -> JSONResponse:
+    headers = {"Retry-After": str(max(1, round(exc.retry_after)))}
+    return JSONResponse(status_code=429, content={"detail": str(exc)}, headers=headers)
+
+
 # API routes under /api
 app.include_router(api_router, prefix="/api")
 app.include_router(auth_router, prefix="/api/auth")
 
 # Serve static frontend assets under /static
 if STATIC_DIR.exists():
-    app.mount("/static", StaticFiles(directory=str(STATIC_DIR), html=True), name="static")
+    app.mount("/static", CachedStaticFiles(directory=str(STATIC_DIR), html=True), name="static")
 
 
 # Health check endpoints for Railway
@@ -40,42 +86,34 @@ async def health_check():
     return {"status": "ok", "service": "cv-adapter"}
 
 
-def _read_index_html() -> Optional[str]:
-    index_path = STATIC_DIR / "index.html"
-    if index_path.exists():
-        return index_path.read_text(encoding="utf-8")
-    return None
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    return Response(content=metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+NOT_BUILT_HTML = (
+    "<html><body><h1>CV Adapter</h1>"
+    "<p>Frontend is not built yet. Run \"npm run build\" in frontend/ or use Docker build.</p>"
+    "</body></html>"
+)
+
+
+def _index_response(request: Request) -> Response:
+    entry = index_page.get()
+    if entry is None:
+        return HTMLResponse(content=NOT_BUILT_HTML, status_code=200)
+    return entry.response(request.headers)
 
 
 @app.get("/", response_class=HTMLResponse)
-async def serve_root() -> HTMLResponse:
-    index_html = _read_index_html()
-    if index_html is None:
-        return HTMLResponse(
-            content=(
-                "<html><body><h1>CV Adapter</h1>"
-                "<p>Frontend is not built yet. Run \"npm run build\" in frontend/ or use Docker build.</p>"
-                "</body></html>"
-            ),
-            status_code=200,
-        )
-    return HTMLResponse(content=index_html)
+async def serve_root(request: Request) -> Response:
+    return _index_response(request)
 
 
 @app.get("/{full_path:path}", response_class=HTMLResponse)
-async def serve_spa(full_path: str, request: Request) -> HTMLResponse:
-    if full_path.startswith("api"):
-        from fastapi import HTTPException
-        raise HTTPException(status_code=404)
-
-    index_html = _read_index_html()
-    if index_html is None:
-        return HTMLResponse(
-            content=(
-                "<html><body><h1>CV Adapter</h1>"
-                "<p>Frontend is not built yet. Run \"npm run build\" in frontend/ or use Docker build.</p>"
-                "</body></html>"
-            ),
-            status_code=200,
-        )
-    return HTMLResponse(content=index_html) 
\ No newline at end of file
+async def serve_spa(full_path: str, request: Request) -> Response:
+    # Unknown API paths get a JSON 404, not the SPA, and without touching the filesystem
+    if full_path == "api" or full_path.startswith("api/"):
+        return JSONResponse(status_code=404, content={"detail": "Not Found"})
+    return _index_response(request)
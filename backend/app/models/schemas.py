@@ -1,18 +1,153 @@
-from pydantic import BaseModel, Field
+from typing import List, Literal
+
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
 class HealthResponse(BaseModel):
     status: str = Field(default="ok")
 
 
+class ResumeBlock(BaseModel):
+    """One block of a resume section, as rendered to PDF (mirrors app.core.pdf.ParsedBlock)."""
+    model_config = ConfigDict(extra="forbid")
+
+    type: Literal["heading", "subheading", "meta", "paragraph", "list"]
+    text: str = Field(default="", description="Block text; empty for lists")
+    items: List[str] = Field(default_factory=list, description="Bullet items; only for lists")
+
+
+class ResumeSectionContent(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    blocks: List[ResumeBlock]
+
+
+class StructuredResume(BaseModel):
+    """Structured LLM output: the adapted resume as PDF-ready sections."""
+    model_config = ConfigDict(extra="forbid")
+
+    sections: List[ResumeSectionContent]
+
+    @model_validator(mode="after")
+    def _require_content(self) -> "StructuredResume":
+        if not any(block.text.strip() or block.items for section in self.sections for block in section.blocks):
+            raise ValueError("Structured resume has no content")
+        return self
+
+
+class ResumeSection(BaseModel):
+    id: str | None = Field(
+        default=None,
+        description="Content id assigned by the server; send only the id to reuse a section it has seen",
+    )
+    blocks: List[ResumeBlock] | None = None
+
+    @model_validator(mode="after")
+    def _require_blocks_or_id(self) -> "ResumeSection":
+        if self.blocks is None and self.id is None:
+            raise ValueError("A section needs blocks or the id of a known section")
+        return self
+
+
 class AdaptRequest(BaseModel):
-    resume_text: str = Field(..., description="Raw resume or CV text")
+    resume_text: str | None = Field(default=None, description="Raw resume or CV text")
+    resume_handle: str | None = Field(
+        default=None,
+        description="Handle returned by /extract, used instead of resume_text",
+    )
     job_description: str = Field(..., description="Target job description text")
     strategy: str | None = Field(
         default=None,
         description="Optional hint about how to adapt (e.g., 'concise', 'keyword-match')",
     )
+    split_sections: bool | None = Field(
+        default=None,
+        description="Adapt each resume section in parallel and merge them (default: server setting)",
+    )
+    consistency_pass: bool | None = Field(
+        default=None,
+        description="With split_sections, run a final pass to make the merged sections consistent",
+    )
+    output_format: Literal["text", "json"] | None = Field(
+        default=None,
+        description="'json' asks the model for structured sections, returned in `sections` (default: server setting)",
+    )
+
+    @model_validator(mode="after")
+    def _require_resume(self) -> "AdaptRequest":
+        if self.resume_text is None and self.resume_handle is None:
+            raise ValueError("Either resume_text or resume_handle is required")
+        return self
+
+
+class JobRequest(AdaptRequest):
+    render_pdf: bool = Field(default=False, description="Also render the result, for download from /api/jobs/{id}/pdf")
+    title: str | None = Field(default=None, description="Optional PDF document title")
+    theme: str | None = Field(default=None, description="Optional PDF theme (classic, modern, compact)")
+    filename: str | None = Field(default=None, description="Optional PDF file name (without extension)")
+
+
+class JobStatus(BaseModel):
+    id: str
+    status: Literal["queued", "running", "succeeded", "failed", "cancelled"]
+    position: int | None = Field(default=None, description="Queued jobs that will start before this one")
+    created_at: float
+    started_at: float | None = None
+    finished_at: float | None = None
+    adapted_resume: str | None = None
+    sections: List[ResumeSection] | None = None
+    model: str | None = Field(default=None, description="Model that produced adapted_resume")
+    pdf_url: str | None = None
+    error: str | None = None
 
 
 class AdaptResponse(BaseModel):
-    adapted_resume: str 
\ No newline at end of file
+    adapted_resume: str 
+    # With output_format "json": the same resume as validated sections, renderable via /api/pdf/sections
+    sections: List[ResumeSection] | None = None
+    model: str | None = Field(default=None, description="Model that produced adapted_resume")
+
+
+class SectionsPdfRequest(BaseModel):
+    sections: List[ResumeSection] = Field(..., min_length=1)
+    title: str | None = Field(default=None, description="Optional document title")
+    theme: str | None = Field(default=None, description="Optional PDF theme (classic, modern, compact)")
+    filename: str | None = Field(default=None, description="Optional file name (without extension)")
+
+class ExtractResponse(BaseModel):
+    handle: str = Field(..., description="Reference to the extracted text for later adapt calls")
+    resume_text: str
+    # Extraction details; omitted when the text came from the cache
+    page_count: int | None = None
+    pages_read: int | None = None
+    page_timings_ms: List[float] | None = None
+    truncated: bool | None = None
+
+
+class BatchAdaptRequest(BaseModel):
+    resume_text: str | None = Field(default=None, description="Resume text to adapt to every job description")
+    resume_handle: str | None = Field(default=None, description="Handle returned by /extract, used instead of resume_text")
+    resume_texts: List[str] | None = Field(
+        default=None,
+        description="Several resumes to adapt to a single job description",
+    )
+    job_descriptions: List[str] = Field(..., min_length=1, description="Target job description texts")
+    strategy: str | None = Field(default=None, description="Optional strategy hint applied to every item")
+
+    @model_validator(mode="after")
+    def _check_shape(self) -> "BatchAdaptRequest":
+        given = [v for v in (self.resume_text, self.resume_handle, self.resume_texts) if v is not None]
+        if len(given) != 1:
+            raise ValueError("Provide exactly one of resume_text, resume_handle or resume_texts")
+        if self.resume_texts is not None and len(self.job_descriptions) != 1:
+            raise ValueError("resume_texts requires exactly one job description")
+        return self
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    resume_index: int
+    job_index: int
+    adapted_resume: str | None = None
+    model: str | None = None
+    error: str | None = None
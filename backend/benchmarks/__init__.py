@@ -0,0 +1 @@
+# Package marker
\ No newline at end of file
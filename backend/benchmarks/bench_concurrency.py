@@ -0,0 +1,91 @@
+"""Concurrent-request throughput of /api/adapt and /api/adapt-upload on one uvicorn worker.
+
+Starts the fake OpenAI server and a single-worker uvicorn for the app, then fires
+``--requests`` requests with ``--concurrency`` in flight and reports throughput.
+
+To compare before/after a change, point ``--app-dir`` at another checkout of
+``backend/`` (e.g. created with ``git worktree add /tmp/before <commit>``):
+
+    python -m benchmarks.bench_concurrency
+    python -m benchmarks.bench_concurrency --app-dir /tmp/before/backend
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from pathlib import Path
+from typing import List
+
+import httpx
+
+from benchmarks.common import BACKEND_DIR, fake_openai_env, free_port, make_resume_pdf, start_uvicorn, wait_for
+
+
+async def _run(base_url: str, endpoint: str, total: int, concurrency: int, pdf_bytes: bytes) -> List[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(client: httpx.AsyncClient, index: int) -> None:
+        # A distinct job description per request keeps the result cache out of the measurement
+        job_description = f"Backend role #{index}"
+        async with semaphore:
+            start = time.perf_counter()
+            if endpoint == "adapt":
+                resp = await client.post(
+                    "/api/adapt",
+                    json={"resume_text": "Experienced engineer", "job_description": job_description},
+                )
+            else:
+                resp = await client.post(
+                    "/api/adapt-upload",
+                    files={"file": ("cv.pdf", pdf_bytes, "application/pdf")},
+                    data={"job_description": job_description},
+                )
+            resp.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=300.0) as client:
+        await asyncio.gather(*(one(client, index) for index in range(total)))
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", type=Path, default=BACKEND_DIR, help="backend/ directory to benchmark")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.5, help="fake upstream latency in seconds")
+    parser.add_argument("--endpoint", choices=["adapt", "adapt-upload", "both"], default="both")
+    args = parser.parse_args()
+
+    fake_port, app_port = free_port(), free_port()
+    env = fake_openai_env(fake_port, args.latency)
+
+    fake = start_uvicorn("benchmarks.fake_openai:app", fake_port, BACKEND_DIR, env)
+    server = start_uvicorn("app.main:app", app_port, args.app_dir, env)
+    try:
+        wait_for(f"http://127.0.0.1:{fake_port}/docs")
+        base_url = f"http://127.0.0.1:{app_port}"
+        wait_for(f"{base_url}/health")
+
+        pdf_bytes = make_resume_pdf()
+        endpoints = ["adapt", "adapt-upload"] if args.endpoint == "both" else [args.endpoint]
+        print(f"app={args.app_dir} requests={args.requests} concurrency={args.concurrency} upstream_latency={args.latency}s")
+        for endpoint in endpoints:
+            start = time.perf_counter()
+            latencies = asyncio.run(_run(base_url, endpoint, args.requests, args.concurrency, pdf_bytes))
+            elapsed = time.perf_counter() - start
+            latencies.sort()
+            p50 = latencies[len(latencies) // 2]
+            print(f"{endpoint:>13}: {len(latencies) / elapsed:8.1f} req/s  p50={p50 * 1000:7.1f} ms  total={elapsed:.2f}s")
+    finally:
+        server.terminate()
+        fake.terminate()
+        server.wait()
+        fake.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Microbenchmark and parity check for parse_text_to_sections and inline rendering.
+
+Compares the current implementation with the original per-line regex version
+(kept below as the reference) on large synthetic resumes:
+
+    python -m benchmarks.bench_parse --lines 5000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import timeit
+from typing import List
+
+from app.core.pdf import ParsedSection, _render_inline, parse_text_to_sections
+
+
+def legacy_parse_text_to_sections(text: str) -> List[ParsedSection]:
+    lines = [ln.strip() for ln in text.splitlines()]
+    sections: List[ParsedSection] = []
+    current = None
+
+    def push_section_if_not_empty() -> None:
+        nonlocal current
+        if current and current['blocks']:
+            sections.append(current)
+            current = None
+
+    is_bold_heading = lambda line: re.match(r'^(?:##\s+|\*\*[^*]+\*\*)$', line) is not None
+    extract_heading_text = lambda line: re.sub(r'^##\s+', '', re.sub(r'^\*\*|\*\*$', '', line))
+    is_italic_solo = lambda line: re.match(r'^\*[^*]+\*$', line) is not None
+    extract_italic_text = lambda line: re.sub(r'^\*|\*$', '', line)
+    is_meta_date = lambda line: re.search(r'(\b\d{4}\b\s*[–-]\s*(?:\b\d{4}\b|Present))|([A-Za-z]{3,9}\s+\d{4}\s*[–-]\s*(?:[A-Za-z]{3,9}\s+)?(?:\d{4}|Present))', line, re.I) is not None
+    is_bullet = lambda line: re.match(r'^[-•]\s+', line) is not None
+
+    for raw in lines:
+        if not raw:
+            continue
+        if is_bold_heading(raw):
+            push_section_if_not_empty()
+            current = {'blocks': [{'type': 'heading', 'text': extract_heading_text(raw)}]}
+            continue
+        if current is None:
+            current = {'blocks': []}
+        if is_italic_solo(raw):
+            current['blocks'].append({'type': 'subheading', 'text': extract_italic_text(raw)})
+            continue
+        if is_meta_date(raw):
+            current['blocks'].append({'type': 'meta', 'text': raw})
+            continue
+        if is_bullet(raw):
+            item_text = re.sub(r'^[-•]\s+', '', raw)
+            if current['blocks'] and current['blocks'][-1]['type'] == 'list':
+                current['blocks'][-1]['items'].append(item_text)
+            else:
+                current['blocks'].append({'type': 'list', 'items': [item_text]})
+            continue
+        current['blocks'].append({'type': 'paragraph', 'text': raw})
+
+    push_section_if_not_empty()
+    return sections if sections else [{'blocks': [{'type': 'paragraph', 'text': text}]}]
+
+
+def legacy_render_inline(text: str) -> str:
+    out = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    out = re.sub(r"\*\*([^*]+)\*\*", r"<b>\1</b>", out)
+    out = re.sub(r"\*([^*]+)\*", r"<i>\1</i>", out)
+    return out
+
+
+LINE_KINDS = [
+    lambda r, i: f"**Section {i}**",
+    lambda r, i: f"## Heading {i}",
+    lambda r, i: f"*Senior Engineer, Company {i}*",
+    lambda r, i: f"Jan {2000 + i % 20} - {'Present' if i % 3 else 'Dec 2023'}",
+    lambda r, i: f"{2000 + i % 20} – {2001 + i % 20}",
+    lambda r, i: f"- Improved **throughput** by {i % 90}% across *{i % 7}* services",
+    lambda r, i: f"• Led a team of {i % 12} engineers & <stakeholders>",
+    lambda r, i: f"-{i} not a bullet",
+    lambda r, i: "",
+    lambda r, i: "   ",
+    lambda r, i: f"Plain paragraph {i} with *mixed **markup*** and ** stray stars",
+    lambda r, i: "*",
+    lambda r, i: "**",
+    lambda r, i: "- 2019 - 2021 bullet with a date",
+    lambda r, i: f"Skills: Python, Go, SQL {'x' * r.randint(0, 80)}",
+]
+
+
+def make_resume(lines: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    return "\n".join(rng.choice(LINE_KINDS)(rng, i) for i in range(lines))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seeds", type=int, default=50, help="number of random documents checked for parity")
+    args = parser.parse_args()
+
+    for seed in range(args.seeds):
+        text = make_resume(args.lines // 10 or 1, seed)
+        assert parse_text_to_sections(text) == legacy_parse_text_to_sections(text), f"parse mismatch (seed={seed})"
+        for line in text.splitlines():
+            assert _render_inline(line) == legacy_render_inline(line), f"inline mismatch: {line!r}"
+    for edge in ["", "   \n  ", "**only heading**", "- a\n- b\nPara\n- c"]:
+        assert parse_text_to_sections(edge) == legacy_parse_text_to_sections(edge), f"parse mismatch: {edge!r}"
+    print(f"parity: ok ({args.seeds} random documents)")
+
+    text = make_resume(args.lines)
+    lines = text.splitlines()
+    for name, new, old in [
+        ("parse_text_to_sections", lambda: parse_text_to_sections(text), lambda: legacy_parse_text_to_sections(text)),
+        ("_render_inline", lambda: [_render_inline(line) for line in lines], lambda: [legacy_render_inline(line) for line in lines]),
+    ]:
+        t_new = min(timeit.repeat(new, number=1, repeat=args.repeat))
+        t_old = min(timeit.repeat(old, number=1, repeat=args.repeat))
+        print(f"{name:>24} ({args.lines} lines): legacy {t_old * 1000:7.2f} ms  current {t_new * 1000:7.2f} ms  speedup {t_old / t_new:4.1f}x")
+
+
+if __name__ == "__main__":
+    main()
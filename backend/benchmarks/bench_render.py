@@ -0,0 +1,56 @@
+"""Per-render cost of render_cv_pdf_from_sections on many small CVs.
+
+Compares rendering with the shared, prebuilt theme against rebuilding the
+stylesheet (and retrying font registration) for every render, which is what
+the renderer used to do. The two variants are interleaved document by
+document so drift (GC, CPU frequency) affects both alike:
+
+    python -m benchmarks.bench_render --cvs 500
+"""
+from __future__ import annotations
+
+import argparse
+import time
+import timeit
+
+from app.core.pdf import _build_theme, _register_base_fonts, get_themes, parse_text_to_sections, render_cv_pdf_from_sections
+from benchmarks.bench_parse import make_resume
+
+
+def _per_render_setup() -> object:
+    _register_base_fonts.__wrapped__()
+    return _build_theme("classic")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cvs", type=int, default=500)
+    parser.add_argument("--lines", type=int, default=10, help="lines per CV")
+    args = parser.parse_args()
+
+    documents = [parse_text_to_sections(make_resume(args.lines, seed)) for seed in range(args.cvs)]
+    for sections in documents[:20]:  # warm-up
+        render_cv_pdf_from_sections(sections)
+
+    setup = min(timeit.repeat(_per_render_setup, number=50, repeat=5)) / 50
+
+    rebuilt = cached = 0.0
+    for sections in documents:
+        start = time.perf_counter()
+        render_cv_pdf_from_sections(sections, theme=_per_render_setup())
+        rebuilt += time.perf_counter() - start
+        start = time.perf_counter()
+        render_cv_pdf_from_sections(sections)
+        cached += time.perf_counter() - start
+    rebuilt /= len(documents)
+    cached /= len(documents)
+
+    print(f"{args.cvs} CVs x {args.lines} lines, themes: {', '.join(get_themes())}")
+    print(f"  per-render style/font setup (isolated): {setup * 1000:6.3f} ms")
+    print(f"  render, setup per call:                 {rebuilt * 1000:6.3f} ms")
+    print(f"  render, prebuilt theme:                 {cached * 1000:6.3f} ms")
+    print(f"  end-to-end saving:                      {(rebuilt - cached) * 1000:6.3f} ms ({(rebuilt - cached) / rebuilt:.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Cold-start profile: import time of the app and time until it serves requests.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 7 --top 20 --output startup.json
+    python -m benchmarks.bench_startup --env CV_ADAPTER_STARTUP_WARMUP=false
+
+Import time comes from ``python -X importtime -c "import app.main"`` in fresh
+interpreters (median of --runs), attributed to top-level packages by their
+own ("self") time, and lists which heavy packages were imported eagerly.
+Time to ready is measured from spawning uvicorn to the first successful
+/health; the first /api/pdf after that shows what a cold request still pays.
+Pass --app-dir to profile another checkout of backend/.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import httpx
+
+from benchmarks.common import BACKEND_DIR, free_port, run_metadata, start_uvicorn
+
+
+# Packages that should only be imported on first use or by the startup warm-up
+HEAVY_PACKAGES = ("openai", "httpx", "pypdf", "reportlab", "authlib")
+
+
+def import_profile(app_dir: Path, env: Dict[str, str]) -> Tuple[float, Dict[str, float]]:
+    """Total import time of app.main and self time per top-level package, in milliseconds."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=str(app_dir),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total = 0.0
+    packages: Dict[str, float] = defaultdict(float)
+    for line in proc.stderr.splitlines():
+        # "import time:       self [us] |  cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        name = name.strip()
+        packages[name.split(".")[0]] += int(self_us) / 1000
+        if name == "app.main":
+            total = int(cumulative_us) / 1000
+    return total, dict(packages)
+
+
+def _wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.005)
+    raise RuntimeError(f"Server at {url} did not start")
+
+
+def time_to_ready(app_dir: Path, env: Dict[str, str]) -> Tuple[float, float]:
+    """Milliseconds from spawning uvicorn to the first /health, and for the first /api/pdf after it."""
+    port = free_port()
+    start = time.perf_counter()
+    server = start_uvicorn("app.main:app", port, app_dir, env)
+    try:
+        _wait_ready(f"http://127.0.0.1:{port}/health")
+        ready = time.perf_counter() - start
+        start = time.perf_counter()
+        response = httpx.post(
+            f"http://127.0.0.1:{port}/api/pdf",
+            data={"text": "**Experience**\n- Cut cold start time in half"},
+            timeout=30.0,
+        )
+        response.raise_for_status()
+        first_pdf = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+    return ready * 1000, first_pdf * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", type=Path, default=BACKEND_DIR, help="backend/ directory to profile")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=12, help="packages to list by import time")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="extra environment for the app (repeatable)")
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([str(args.app_dir), env.get("PYTHONPATH", "")])
+    env.update(dict(item.split("=", 1) for item in args.env))
+
+    totals: List[float] = []
+    per_package: Dict[str, List[float]] = defaultdict(list)
+    for _ in range(args.runs):
+        total, packages = import_profile(args.app_dir, env)
+        totals.append(total)
+        for name, ms in packages.items():
+            per_package[name].append(ms)
+    packages = {name: statistics.median(values) for name, values in per_package.items()}
+    eager = [name for name in HEAVY_PACKAGES if name in packages]
+
+    ready, first_pdf = zip(*(time_to_ready(args.app_dir, env) for _ in range(args.runs)))
+
+    print(f"app={args.app_dir} runs={args.runs}")
+    print(f"  import app.main:       {statistics.median(totals):8.1f} ms")
+    print(f"  spawn to /health:      {statistics.median(ready):8.1f} ms")
+    print(f"  first /api/pdf:        {statistics.median(first_pdf):8.1f} ms")
+    print(f"  heavy packages loaded at import: {', '.join(eager) or 'none'}")
+    print(f"  top {args.top} packages by import time:")
+    for name, ms in sorted(packages.items(), key=lambda item: item[1], reverse=True)[: args.top]:
+        print(f"    {name:<28} {ms:8.1f} ms")
+
+    if args.output:
+        report = {
+            "meta": run_metadata(args.app_dir, args),
+            "import_ms": statistics.median(totals),
+            "ready_ms": statistics.median(ready),
+            "first_pdf_ms": statistics.median(first_pdf),
+            "eager_heavy_packages": eager,
+            "packages_ms": dict(sorted(packages.items(), key=lambda item: item[1], reverse=True)),
+        }
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nresults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Helpers shared by the benchmarks: local servers and generated inputs."""
+from __future__ import annotations
+
+import argparse
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Optional
+
+import httpx
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url: str, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server at {url} did not start")
+
+
+def start_uvicorn(app: str, port: int, cwd: Path, env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--workers", "1", "--log-level", "warning"],
+        cwd=str(cwd),
+        env=env,
+    )
+
+
+def git_commit(app_dir: Path) -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=app_dir, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata(app_dir: Path, args: argparse.Namespace) -> Dict[str, object]:
+    """What a saved benchmark result was measured on, for comparing runs later."""
+    return {
+        "commit": git_commit(app_dir),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "args": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+    }
+
+
+def fake_openai_env(fake_port: int, latency: float, token_interval: float = 0.0) -> Dict[str, str]:
+    """Environment for the app and the fake server, pointing the app at the fake."""
+    fake_url = f"http://127.0.0.1:{fake_port}/v1"
+    env = dict(os.environ)
+    env.update(
+        {
+            "FAKE_OPENAI_LATENCY": str(latency),
+            "FAKE_OPENAI_TOKEN_INTERVAL": str(token_interval),
+            "OPENAI_API_KEY": "sk-bench",
+            "OPENAI_BASE_URL": fake_url,
+            "CV_ADAPTER_OPENAI_BASE_URL": fake_url,
+            "PYTHONPATH": os.pathsep.join([str(BACKEND_DIR), env.get("PYTHONPATH", "")]),
+        }
+    )
+    return env
+
+
+def make_resume_pdf(lines: int = 60, text: str | None = None) -> bytes:
+    """A text-only PDF of `lines` generated bullets, or of the given text (one line per row)."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    rows = text.splitlines() if text is not None else [
+        f"- Delivered project {i} improving throughput by {i % 50}% for team {i % 7}" for i in range(lines)
+    ]
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    y = 750
+    for row in rows:
+        if y < 60:
+            pdf.showPage()
+            y = 750
+        pdf.drawString(60, y, row[:110])
+        y -= 14
+    pdf.save()
+    return buffer.getvalue()
@@ -0,0 +1,149 @@
+"""Minimal local stand-in for the OpenAI API used by the benchmarks.
+
+Run with: uvicorn benchmarks.fake_openai:app --port 9100
+
+Serves Chat Completions and the Responses API, both plain and streamed (SSE).
+Timing is controlled by environment variables:
+
+    FAKE_OPENAI_LATENCY         seconds before the first token (default 0.5)
+    FAKE_OPENAI_TOKEN_INTERVAL  seconds between streamed chunks (default 0.0);
+                                plain responses wait for all chunks too
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import re
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+
+LATENCY = float(os.environ.get("FAKE_OPENAI_LATENCY", "0.5"))
+TOKEN_INTERVAL = float(os.environ.get("FAKE_OPENAI_TOKEN_INTERVAL", "0.0"))
+
+FAKE_RESUME = (
+    "**Summary**\n"
+    "Backend engineer with 8 years of experience building *reliable* APIs.\n"
+    "**Experience**\n"
+    "*Senior Engineer, Acme Corp*\n"
+    "Jan 2020 - Present\n"
+    "- Cut p95 latency by 40% by pooling upstream connections\n"
+    "- Led migration of 30 services to async Python\n"
+    "**Skills**\n"
+    "Python, FastAPI, PostgreSQL, Kubernetes\n"
+)
+
+app = FastAPI(title="Fake OpenAI")
+
+
+def _usage() -> Dict[str, int]:
+    return {"prompt_tokens": 400, "completion_tokens": 120, "total_tokens": 520}
+
+
+CHUNKS: List[str] = re.findall(r"\S+\s*", FAKE_RESUME)
+
+
+async def _generation_delay() -> None:
+    await asyncio.sleep(LATENCY + TOKEN_INTERVAL * len(CHUNKS))
+
+
+def _sse(data: Dict[str, Any], event: str | None = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+def _stream(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(events, media_type="text/event-stream")
+
+
+async def _chat_stream(model: str, include_usage: bool) -> AsyncIterator[str]:
+    chunk_id = f"chatcmpl-{uuid.uuid4().hex}"
+    base = {"id": chunk_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+    await asyncio.sleep(LATENCY)
+    for index, text in enumerate(CHUNKS):
+        if index:
+            await asyncio.sleep(TOKEN_INTERVAL)
+        yield _sse({**base, "choices": [{"index": 0, "delta": {"content": text}, "finish_reason": None}]})
+    yield _sse({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+    if include_usage:
+        yield _sse({**base, "choices": [], "usage": _usage()})
+    yield "data: [DONE]\n\n"
+
+
+def _response_object(model: str, response_id: str, message_id: str) -> Dict[str, Any]:
+    return {
+        "id": response_id,
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": model,
+        "status": "completed",
+        "output": [
+            {
+                "type": "message",
+                "id": message_id,
+                "role": "assistant",
+                "status": "completed",
+                "content": [{"type": "output_text", "text": FAKE_RESUME, "annotations": []}],
+            }
+        ],
+        "usage": {"input_tokens": 400, "output_tokens": 120, "total_tokens": 520},
+    }
+
+
+async def _responses_stream(model: str) -> AsyncIterator[str]:
+    response_id, message_id = f"resp_{uuid.uuid4().hex}", f"msg_{uuid.uuid4().hex}"
+    await asyncio.sleep(LATENCY)
+    sequence = 0
+    for index, text in enumerate(CHUNKS):
+        if index:
+            await asyncio.sleep(TOKEN_INTERVAL)
+        sequence += 1
+        event = {
+            "type": "response.output_text.delta",
+            "item_id": message_id,
+            "output_index": 0,
+            "content_index": 0,
+            "delta": text,
+            "sequence_number": sequence,
+            "logprobs": [],
+        }
+        yield _sse(event, event["type"])
+    completed = {"type": "response.completed", "sequence_number": sequence + 1, "response": _response_object(model, response_id, message_id)}
+    yield _sse(completed, completed["type"])
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request) -> Any:
+    body = await request.json()
+    if body.get("stream"):
+        include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+        return _stream(_chat_stream(body.get("model"), include_usage))
+    await _generation_delay()
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model"),
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": FAKE_RESUME},
+            }
+        ],
+        "usage": _usage(),
+    }
+
+
+@app.post("/v1/responses")
+async def responses(request: Request) -> Any:
+    body = await request.json()
+    if body.get("stream"):
+        return _stream(_responses_stream(body.get("model")))
+    await _generation_delay()
+    return _response_object(body.get("model"), f"resp_{uuid.uuid4().hex}", f"msg_{uuid.uuid4().hex}")
@@ -0,0 +1,305 @@
+"""Load test of the full request path against a local fake OpenAI server.
+
+Starts the fake OpenAI server and a single-worker uvicorn for the app, then
+runs each scenario with ``--concurrency`` requests in flight:
+
+    adapt         POST /api/adapt with resume text
+    adapt-stream  POST /api/adapt/stream (SSE), also reports time to first delta
+    adapt-upload  POST /api/adapt-upload over a corpus of generated PDFs
+    pdf           POST /api/pdf rendering a distinct resume per request
+
+Every request uses a distinct job description (or text, for /api/pdf) so the
+result caches don't hide the work; the upload corpus is cycled, so extracted
+text is reused after the first pass, as with real re-uploads.
+
+For each scenario it reports throughput, p50/p95/p99 latency, errors and the
+peak RSS of the app (server plus worker processes, Linux only). Results can be
+saved as JSON and compared with an earlier run:
+
+    python -m benchmarks.loadtest --output before.json
+    python -m benchmarks.loadtest --compare before.json --output after.json
+    python -m benchmarks.loadtest --app-dir /tmp/before/backend --scenarios adapt,pdf
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.bench_parse import make_resume
+from benchmarks.common import BACKEND_DIR, fake_openai_env, free_port, make_resume_pdf, run_metadata, start_uvicorn, wait_for
+
+
+SCENARIOS = ("adapt", "adapt-stream", "adapt-upload", "pdf")
+
+
+@dataclass
+class ScenarioResult:
+    requests: int
+    errors: int
+    seconds: float
+    throughput_rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    peak_rss_mb: Optional[float]
+    # Streaming only: time until the first delta event arrived
+    ttfb_p50_ms: Optional[float] = None
+    ttfb_p95_ms: Optional[float] = None
+    error_samples: List[str] = field(default_factory=list)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    n = len(sorted_values)
+    rank = min(max(math.ceil(pct / 100 * n), 1), n)
+    return sorted_values[rank - 1]
+
+
+def _process_tree_rss_kb(root_pid: int) -> Optional[int]:
+    """RSS of a process and all its descendants, from /proc (None where /proc is unavailable)."""
+    proc = Path("/proc")
+    if not proc.exists():
+        return None
+    children: Dict[int, List[int]] = {}
+    rss: Dict[int, int] = {}
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            status = (entry / "status").read_text()
+        except OSError:
+            continue
+        fields = dict(line.split(":", 1) for line in status.splitlines() if ":" in line)
+        pid = int(entry.name)
+        children.setdefault(int(fields.get("PPid", "0").strip() or 0), []).append(pid)
+        rss[pid] = int(fields.get("VmRSS", "0 kB").split()[0])
+    total, stack = 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        total += rss.get(pid, 0)
+        stack.extend(children.get(pid, []))
+    return total
+
+
+class RssSampler:
+    """Samples the app's process-tree RSS in a background thread and keeps the peak."""
+
+    def __init__(self, pid: int, interval: float = 0.05) -> None:
+        self.pid = pid
+        self.interval = interval
+        self.peak_kb: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            sample = _process_tree_rss_kb(self.pid)
+            if sample is not None:
+                self.peak_kb = max(self.peak_kb or 0, sample)
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "RssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def make_corpus(size: int) -> List[bytes]:
+    # Resumes of varying length (roughly one to four pages), deterministic per index
+    corpus = []
+    for index in range(size):
+        text = make_resume(40 + (index * 37) % 160, seed=index).replace("*", "")
+        corpus.append(make_resume_pdf(text=text))
+    return corpus
+
+
+async def _one_request(client: httpx.AsyncClient, scenario: str, index: int, corpus: List[bytes]) -> Optional[float]:
+    """Send one request; returns the time to the first streamed delta for adapt-stream."""
+    # Scenario and index in the job description keep every request a result-cache miss
+    job_description = f"Backend engineer #{index} ({scenario}): Python, FastAPI, PostgreSQL, Kubernetes"
+    if scenario == "adapt":
+        resp = await client.post("/api/adapt", json={"resume_text": make_resume(60, seed=index % 50), "job_description": job_description})
+    elif scenario == "adapt-upload":
+        resp = await client.post(
+            "/api/adapt-upload",
+            files={"file": (f"cv-{index}.pdf", corpus[index % len(corpus)], "application/pdf")},
+            data={"job_description": job_description},
+        )
+    elif scenario == "pdf":
+        resp = await client.post("/api/pdf", data={"text": make_resume(60, seed=index), "title": f"CV {index}"})
+    else:
+        start = time.perf_counter()
+        first_delta: Optional[float] = None
+        payload = {"resume_text": make_resume(60, seed=index % 50), "job_description": job_description}
+        async with client.stream("POST", "/api/adapt/stream", json=payload) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                if line.startswith("event: delta") and first_delta is None:
+                    first_delta = time.perf_counter() - start
+                elif line.startswith("event: error"):
+                    raise RuntimeError("stream ended with an error event")
+        return first_delta
+    resp.raise_for_status()
+    return None
+
+
+async def run_scenario(
+    base_url: str,
+    scenario: str,
+    total: int,
+    concurrency: int,
+    corpus: List[bytes],
+    server_pid: int,
+    first_index: int = 0,
+) -> ScenarioResult:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    first_deltas: List[float] = []
+    errors: List[str] = []
+
+    async def one(client: httpx.AsyncClient, index: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                first_delta = await _one_request(client, scenario, index, corpus)
+            except Exception as exc:
+                errors.append(f"{exc.__class__.__name__}: {exc}"[:200])
+                return
+            latencies.append(time.perf_counter() - start)
+            if first_delta is not None:
+                first_deltas.append(first_delta)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=300.0) as client:
+        with RssSampler(server_pid) as sampler:
+            start = time.perf_counter()
+            await asyncio.gather(*(one(client, index) for index in range(first_index, first_index + total)))
+            elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    first_deltas.sort()
+    ms = lambda seconds: round(seconds * 1000, 1)  # noqa: E731
+    return ScenarioResult(
+        requests=total,
+        errors=len(errors),
+        seconds=round(elapsed, 3),
+        throughput_rps=round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        p50_ms=ms(percentile(latencies, 50)),
+        p95_ms=ms(percentile(latencies, 95)),
+        p99_ms=ms(percentile(latencies, 99)),
+        max_ms=ms(latencies[-1]) if latencies else 0.0,
+        peak_rss_mb=round(sampler.peak_kb / 1024, 1) if sampler.peak_kb is not None else None,
+        ttfb_p50_ms=ms(percentile(first_deltas, 50)) if first_deltas else None,
+        ttfb_p95_ms=ms(percentile(first_deltas, 95)) if first_deltas else None,
+        error_samples=errors[:5],
+    )
+
+
+def _print_result(name: str, result: ScenarioResult) -> None:
+    rss = f"{result.peak_rss_mb:7.1f} MB" if result.peak_rss_mb is not None else "      n/a"
+    line = (
+        f"{name:>13}: {result.throughput_rps:8.1f} req/s  p50={result.p50_ms:8.1f}  p95={result.p95_ms:8.1f}  "
+        f"p99={result.p99_ms:8.1f} ms  errors={result.errors}  peak_rss={rss}"
+    )
+    if result.ttfb_p50_ms is not None:
+        line += f"  first_delta_p50={result.ttfb_p50_ms:.1f} ms"
+    print(line)
+    for sample in result.error_samples:
+        print(f"{'':>15}{sample}")
+
+
+def _print_comparison(baseline: dict, current: dict) -> None:
+    print(f"\ncompared with {baseline['meta'].get('commit') or 'baseline'} ({baseline['meta'].get('timestamp')}):")
+    for name, result in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        deltas = []
+        for key, label in (("throughput_rps", "req/s"), ("p95_ms", "p95"), ("p99_ms", "p99"), ("peak_rss_mb", "rss")):
+            old, new = before.get(key), result.get(key)
+            if old and new is not None:
+                deltas.append(f"{label} {old:.1f} -> {new:.1f} ({(new - old) / old * 100:+.1f}%)")
+        print(f"{name:>13}: " + "  ".join(deltas))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", type=Path, default=BACKEND_DIR, help="backend/ directory to benchmark")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"comma-separated subset of {', '.join(SCENARIOS)}")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured requests per scenario")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake upstream time to first token (seconds)")
+    parser.add_argument("--token-interval", type=float, default=0.005, help="fake upstream delay between streamed chunks (seconds)")
+    parser.add_argument("--corpus-size", type=int, default=20, help="generated PDFs for adapt-upload")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="extra environment for the app (repeatable)")
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--compare", type=Path, help="JSON from an earlier run to compare against")
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    fake_port, app_port = free_port(), free_port()
+    env = fake_openai_env(fake_port, args.latency, args.token_interval)
+    env.update(dict(item.split("=", 1) for item in args.env))
+    # Keep the app's client-side rate limiter out of the way; it would cap throughput, not measure it
+    env.setdefault("CV_ADAPTER_LLM_REQUESTS_PER_MINUTE", "0")
+    env.setdefault("CV_ADAPTER_LLM_TOKENS_PER_MINUTE", "0")
+
+    corpus = make_corpus(args.corpus_size) if "adapt-upload" in scenarios else []
+    fake = start_uvicorn("benchmarks.fake_openai:app", fake_port, BACKEND_DIR, env)
+    server = start_uvicorn("app.main:app", app_port, args.app_dir, env)
+    results: Dict[str, dict] = {}
+    try:
+        wait_for(f"http://127.0.0.1:{fake_port}/docs")
+        base_url = f"http://127.0.0.1:{app_port}"
+        wait_for(f"{base_url}/health")
+
+        print(
+            f"app={args.app_dir} requests={args.requests} concurrency={args.concurrency} "
+            f"upstream_latency={args.latency}s token_interval={args.token_interval}s"
+        )
+        for scenario in scenarios:
+            if args.warmup:
+                # Warm-up requests get their own indexes so the measured ones still miss the caches
+                asyncio.run(run_scenario(base_url, scenario, args.warmup, args.concurrency, corpus, server.pid, first_index=10_000_000))
+            result = asyncio.run(run_scenario(base_url, scenario, args.requests, args.concurrency, corpus, server.pid))
+            _print_result(scenario, result)
+            results[scenario] = asdict(result)
+    finally:
+        server.terminate()
+        fake.terminate()
+        server.wait()
+        fake.wait()
+
+    report = {
+        "meta": run_metadata(args.app_dir, args),
+        "scenarios": results,
+    }
+    if args.compare:
+        _print_comparison(json.loads(args.compare.read_text()), report)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nresults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
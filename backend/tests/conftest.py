@@ -0,0 +1,7 @@
+import os
+
+# Settings are read at import, so configure the app before any test imports it
+os.environ.setdefault("CV_ADAPTER_LLM_BACKEND", "fake")
+os.environ.setdefault("CV_ADAPTER_STARTUP_WARMUP", "false")
+os.environ.setdefault("CV_ADAPTER_CPU_POOL_WORKERS", "0")
+os.environ.setdefault("CV_ADAPTER_CACHE_BACKEND", "none")
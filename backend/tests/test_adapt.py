@@ -0,0 +1,164 @@
+import asyncio
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import fake_llm
+from app.main import app
+
+
+RESUME = "**Experience**\n*Engineer, Acme*\n- Built the payments platform\n\n**Skills**\n- Python"
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+# Every adapt_resume caller must use the Adaptation fields, not unpack a fixed number of values
+
+def test_adapt(client):
+    response = client.post("/api/adapt", json={"resume_text": RESUME, "job_description": "Python Developer"})
+    assert response.status_code == 200
+    body = response.json()
+    assert "**Experience**" in body["adapted_resume"]
+    assert body["model"] == response.headers["x-model"]
+
+
+def test_metrics_label_routes_by_full_path(client):
+    client.post("/api/adapt", json={"resume_text": RESUME, "job_description": "Python Developer"})
+    metrics = client.get("/metrics").text
+    assert 'cv_adapter_http_request_duration_seconds_count{method="POST",route="/api/adapt",status="200"}' in metrics
+
+
+def test_adapt_json_sections(client):
+    body = {"resume_text": RESUME, "job_description": "Python Developer", "output_format": "json"}
+    sections = client.post("/api/adapt", json=body).json()["sections"]
+    assert sections and all(section["id"] for section in sections)
+
+    response = client.post("/api/pdf/sections", json={"sections": [{"id": section["id"]} for section in sections]})
+    assert response.status_code == 200
+    assert response.content.startswith(b"%PDF")
+
+
+def _sse_events(text):
+    for block in text.strip().split("\n\n"):
+        event, data = block.split("\n", 1)
+        yield event.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+
+def test_adapt_stream(client):
+    response = client.post("/api/adapt/stream", json={"resume_text": RESUME, "job_description": "Python Developer"})
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = list(_sse_events(response.text))
+    deltas, (last, done) = events[:-1], events[-1]
+    assert deltas and all(event == "delta" for event, _ in deltas)
+    assert "**Experience**" in "".join(data["text"] for _, data in deltas)
+    assert last == "done" and done["model"]
+
+
+def test_adapt_stream_disconnect_closes_upstream(client, monkeypatch):
+    upstream = []
+
+    async def slow_iterate(stream):
+        upstream.append(stream)
+        for event in stream._events:
+            if stream.closed:
+                return
+            await asyncio.sleep(0.01)
+            yield event
+
+    monkeypatch.setattr(fake_llm._FakeStream, "_iterate", slow_iterate)
+    body = json.dumps({"resume_text": RESUME, "job_description": "Stream Developer"}).encode()
+    sent = []
+
+    async def main():
+        first_chunk = asyncio.Event()
+        requested = False
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # The client goes away after reading the first event
+            await first_chunk.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+            if message["type"] == "http.response.body" and message.get("body"):
+                first_chunk.set()
+
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": "/api/adapt/stream",
+            "raw_path": b"/api/adapt/stream",
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"host", b"testserver"), (b"content-type", b"application/json")],
+            "client": ("testclient", 50000),
+            "server": ("testserver", 80),
+        }
+        await asyncio.wait_for(app(scope, receive, send), timeout=5)
+
+    asyncio.run(main())
+    chunks = b"".join(message.get("body", b"") for message in sent if message["type"] == "http.response.body")
+    assert b"event: delta" in chunks
+    assert b"event: done" not in chunks
+    assert len(upstream) == 1 and upstream[0].closed
+
+
+def test_batch(client):
+    payload = {"resume_text": RESUME, "job_descriptions": ["Python Developer", "Go Developer"]}
+    lines = [json.loads(line) for line in client.post("/api/adapt/batch", json=payload).text.splitlines()]
+    items, summary = lines[:-1], lines[-1]
+    assert summary == {"done": True, "total": 2, "failed": 0}
+    assert all(item["adapted_resume"] and item["model"] and "error" not in item for item in items)
+
+
+def test_extract_returns_pages_without_page_breaks(client):
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    for line in ("Built the payments platform", "Led the billing migration"):
+        pdf.drawString(72, 720, line)
+        pdf.showPage()
+    pdf.save()
+    response = client.post("/api/extract", files={"file": ("resume.pdf", buffer.getvalue(), "application/pdf")})
+    assert response.status_code == 200
+    assert response.json()["resume_text"] == "Built the payments platform\n\nLed the billing migration"
+
+
+def test_adapt_pdf(client):
+    response = client.post("/api/adapt-pdf", data={"resume_text": RESUME, "job_description": "Python Developer"})
+    assert response.status_code == 200
+    assert response.headers["x-model"]
+    assert response.content.startswith(b"%PDF")
+
+
+def test_job(client):
+    body = {"resume_text": RESUME, "job_description": "Python Developer", "render_pdf": True}
+    job = client.post("/api/jobs", json=body).json()
+    status = client.get(f"/api/jobs/{job['id']}", params={"wait": 5}).json()
+    assert status["status"] == "succeeded"
+    assert status["adapted_resume"] and status["model"]
+    assert client.get(f"/api/jobs/{job['id']}/pdf").status_code == 200
+
+
+def test_job_is_private_to_its_owner(client):
+    body = {"resume_text": RESUME, "job_description": "Python Developer", "render_pdf": True}
+    job_id = client.post("/api/jobs", json=body).json()["id"]
+    assert client.get(f"/api/jobs/{job_id}", params={"wait": 5}).json()["status"] == "succeeded"
+
+    other = TestClient(app, client=("203.0.113.7", 50000))
+    assert other.get(f"/api/jobs/{job_id}").status_code == 404
+    assert other.get(f"/api/jobs/{job_id}/pdf").status_code == 404
+    assert other.delete(f"/api/jobs/{job_id}").status_code == 404
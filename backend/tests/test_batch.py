@@ -0,0 +1,23 @@
+import asyncio
+import json
+
+from app.batch import BatchItem, Pipeline, iter_directory
+
+
+def test_pipeline_writes_pdf_and_model(tmp_path):
+    pipeline = Pipeline(tmp_path, concurrency=1, cpu_slots=1, default_theme=None)
+    item = BatchItem(id="jane", job_description="Python Developer", resume_text="**Experience**\n- Built things")
+    asyncio.run(pipeline.run_item(item))
+
+    record = json.loads((tmp_path / "results.jsonl").read_text())
+    assert record["status"] == "ok", record
+    assert record["model"] and record["adapted_resume"]
+    assert (tmp_path / "jane.pdf").read_bytes().startswith(b"%PDF")
+
+
+def test_iter_directory_skips_shared_job_description(tmp_path):
+    (tmp_path / "jane.txt").write_text("**Experience**\n- Built things")
+    (tmp_path / "job.txt").write_text("Python Developer")
+
+    items = list(iter_directory(tmp_path, "Python Developer", exclude=tmp_path / "job.txt"))
+    assert [item.id for item in items] == ["jane"]
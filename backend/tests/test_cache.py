@@ -0,0 +1,89 @@
+import asyncio
+import time
+
+from app.core import llm, pdf
+from app.core.cache import MemoryCache, ResultCache, SizedLRU, SqliteCache
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("1", "3")
+
+
+def test_memory_cache_expires_entries():
+    cache = MemoryCache(max_entries=10, ttl_seconds=0.05)
+    cache.set("a", "1")
+    assert cache.get("a") == "1"
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert cache.size() == 0
+
+
+def test_sized_lru_evicts_by_total_size():
+    cache = SizedLRU(max_bytes=10)
+    cache.set("a", b"12345")
+    cache.set("b", b"12345")
+    cache.get("a")
+    cache.set("c", b"123")
+    assert "b" not in cache
+    assert cache.total_bytes == 8
+    # A value larger than the whole cache is not stored
+    cache.set("d", b"x" * 11)
+    assert "d" not in cache
+
+
+def test_sqlite_cache_survives_reopen(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    SqliteCache(path, max_entries=10, ttl_seconds=60).set("a", "1")
+    reopened = SqliteCache(path, max_entries=10, ttl_seconds=60)
+    assert reopened.get("a") == "1"
+    assert reopened.size() == 1
+
+
+def test_sqlite_cache_expires_and_bounds_entries(tmp_path):
+    cache = SqliteCache(str(tmp_path / "cache.sqlite3"), max_entries=2, ttl_seconds=0.05)
+    cache.set("a", "1")
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    cache.ttl_seconds = 60
+    for key in "bcd":
+        cache.set(key, key)
+        # Distinct access times, so the eviction order is well defined
+        time.sleep(0.01)
+    assert cache.size() == 2
+    assert cache.get("d") == "d"
+
+
+def test_result_cache_counts_hits_and_misses(tmp_path):
+    cache = ResultCache(SqliteCache(str(tmp_path / "cache.sqlite3"), 10, 60), "sqlite")
+
+    async def main():
+        await cache.set("a", "1")
+        return await cache.get("a"), await cache.get("b"), await cache.stats()
+
+    value, missing, stats = asyncio.run(main())
+    assert (value, missing) == ("1", None)
+    assert stats == {"backend": "sqlite", "hits": 1, "misses": 1, "size": 1}
+
+
+def test_result_key_depends_on_model_and_prompt_version(monkeypatch):
+    key = llm._result_cache_key("gpt-4o-mini", "Resume", "Job", None)
+    # Whitespace differences don't matter
+    assert llm._result_cache_key("gpt-4o-mini", "  Resume \n\n", "Job", None) == key
+    assert llm._result_cache_key("gpt-4o", "Resume", "Job", None) != key
+    assert llm._result_cache_key("gpt-4o-mini", "Resume", "Job", "concise") != key
+    monkeypatch.setattr(llm, "PROMPT_VERSION", "next")
+    assert llm._result_cache_key("gpt-4o-mini", "Resume", "Job", None) != key
+
+
+def test_pdf_key_depends_on_theme_and_render_version(monkeypatch):
+    key = pdf.pdf_render_key("Resume", "CV", "classic")
+    assert pdf.pdf_render_key("Resume", "CV", "classic") == key
+    assert pdf.pdf_render_key("Resume", "CV", "modern") != key
+    monkeypatch.setattr(pdf, "RENDER_VERSION", "next")
+    assert pdf.pdf_render_key("Resume", "CV", "classic") != key
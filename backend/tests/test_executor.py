@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core import executor
+from app.core.config import settings
+
+
+@pytest.fixture
+def process_pool(monkeypatch):
+    monkeypatch.setattr(settings, "cpu_pool_workers", 2)
+    monkeypatch.setattr(settings, "cpu_job_timeout_seconds", 2.0)
+    yield
+    executor.shutdown_executor()
+
+
+def test_timeout_does_not_fail_other_jobs(process_pool):
+    async def main():
+        # Warm the pool so worker start-up doesn't count against the timeout
+        await asyncio.gather(executor.run_cpu_bound(time.sleep, 0), executor.run_cpu_bound(time.sleep, 0))
+        slow = asyncio.ensure_future(executor.run_cpu_bound(time.sleep, 10))
+        await asyncio.sleep(1.0)
+        # Still running (or queued behind it) when the slow job times out and its pool is killed
+        others = await asyncio.gather(
+            executor.run_cpu_bound(time.sleep, 1.5),
+            executor.run_cpu_bound(time.sleep, 0.1),
+            return_exceptions=True,
+        )
+        return (await asyncio.gather(slow, return_exceptions=True))[0], *others
+
+    slow, short, queued = asyncio.run(main())
+    assert isinstance(slow, executor.WorkerTimeoutError)
+    assert short is None
+    assert queued is None
+
+
+def test_queued_jobs_are_not_timed_while_waiting_for_a_worker(process_pool):
+    async def main():
+        await asyncio.gather(executor.run_cpu_bound(time.sleep, 0), executor.run_cpu_bound(time.sleep, 0))
+        # Six jobs just under the timeout on two workers: most of them queue for longer than the timeout
+        return await asyncio.gather(*(executor.run_cpu_bound(time.sleep, 1.2) for _ in range(6)), return_exceptions=True)
+
+    assert asyncio.run(main()) == [None] * 6
@@ -0,0 +1,63 @@
+from app.core.config import settings
+from app.core.pdf import PAGE_BREAK
+from app.core.prompt import compact_inputs, drop_page_artifacts, split_resume
+
+
+def test_resume_keeps_repeated_content():
+    resume = (
+        "**Experience**\n"
+        "*Senior Software Engineer*\nAcme Corp\n- Built the payments platform\n"
+        "*Senior Software Engineer*\nGlobex\n- Built the payments platform\n"
+        "**Skills**\n- Python"
+    )
+    compacted, _ = compact_inputs(resume, "Python Developer", "gpt-4o-mini")
+    assert compacted.count("*Senior Software Engineer*") == 2
+    assert compacted.count("- Built the payments platform") == 2
+
+
+def test_resume_drops_page_headers_and_footers():
+    header, footer = "Jane Doe - Curriculum Vitae", "jane@example.com | +1 555 0100"
+    page_one = f"{header}\n**Experience**\n- Built the payments platform\n{footer}\nPage 1 of 2"
+    page_two = f"{header}\n- Led the billing migration\n**Skills**\n{footer}\nPage 2 of 2"
+    text = drop_page_artifacts(f"{page_one}\n{PAGE_BREAK}\n{page_two}")
+    assert text.count(header) == 1
+    assert text.count(footer) == 1
+    assert "Page" not in text
+    assert "- Led the billing migration" in text
+
+
+def test_job_description_dedupes_every_repeat():
+    _, job = compact_inputs("**Skills**\n- Python", "Strong Python experience\nStrong Python experience", "gpt-4o-mini")
+    assert job == "Strong Python experience"
+
+
+def test_job_description_keeps_requirements_that_mention_benefits():
+    job_description = (
+        "Senior Backend Engineer\n\n"
+        "Requirements:\n- 5+ years of Python\n- Kafka and Postgres\n- On-call rotation; we offer flexible PTO\n\n"
+        "We work without regard to time zones.\n\n"
+        "About us: We are an equal opportunity employer."
+    )
+    _, job = compact_inputs("**Skills**\n- Python", job_description, "gpt-4o-mini")
+    assert "- Kafka and Postgres" in job
+    assert "flexible PTO" in job
+    assert "without regard to time zones" in job
+    assert "equal opportunity" not in job
+
+
+def test_page_breaks_are_stripped_without_compaction(monkeypatch):
+    monkeypatch.setattr(settings, "prompt_compaction", False)
+    resume, _ = compact_inputs(f"- Built the payments platform\n{PAGE_BREAK}\n- Led the billing migration", "Python", "gpt-4o-mini")
+    assert resume == "- Built the payments platform\n\n- Led the billing migration"
+
+
+def test_split_resume_keeps_caps_name_and_company_lines():
+    resume = (
+        "JANE DOE\njane@example.com\n\n"
+        "EXPERIENCE\nACME CORP\nSenior Engineer, 2019 - 2023\n- Built the payments platform\n\n"
+        "Technical Skills:\nPython, Go"
+    )
+    preamble, sections = split_resume(resume)
+    assert preamble == "JANE DOE\njane@example.com"
+    assert [title for title, _ in sections] == ["EXPERIENCE", "Technical Skills"]
+    assert "ACME CORP" in sections[0][1]
@@ -0,0 +1,157 @@
+import asyncio
+import email.utils
+import time
+
+import httpx
+import openai
+import pytest
+
+from app.core import resilience
+from app.core.config import settings
+from app.core.resilience import CircuitBreaker, RateLimiter, UpstreamUnavailableError
+
+
+@pytest.fixture(autouse=True)
+def fresh_guards(monkeypatch):
+    monkeypatch.setattr(resilience, "_guards", {})
+    monkeypatch.setattr(settings, "llm_backoff_base", 0.0)
+    monkeypatch.setattr(settings, "llm_requests_per_minute", 0)
+    monkeypatch.setattr(settings, "llm_tokens_per_minute", 0)
+
+
+def status_error(status_code, headers=None):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(status_code, headers=headers, request=request)
+    return openai.APIStatusError("upstream error", response=response, body=None)
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30)
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.check()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(UpstreamUnavailableError):
+        breaker.check()
+
+
+def test_half_open_breaker_lets_exactly_one_probe_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    breaker.record_failure()
+    assert breaker.state == "half_open"
+    breaker.check()
+    with pytest.raises(UpstreamUnavailableError):
+        breaker.check()
+    # A cancelled probe hands the probe to the next call
+    breaker.abandon_probe()
+    breaker.check()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_failed_probe_opens_breaker_again():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    breaker.record_failure()
+    breaker.check()
+    breaker.reset_seconds = 30
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_client_error_closes_breaker():
+    guard = resilience.get_guard("premium")
+    guard.breaker.reset_seconds = 0
+    for _ in range(guard.breaker.failure_threshold):
+        guard.breaker.record_failure()
+
+    async def bad_request():
+        raise status_error(400)
+
+    with pytest.raises(openai.APIStatusError):
+        asyncio.run(resilience.call_llm("premium", 100, bad_request))
+    assert guard.breaker.state == "closed"
+
+
+def test_retries_then_maps_to_unavailable(monkeypatch):
+    monkeypatch.setattr(settings, "llm_max_attempts", 2)
+    calls = []
+
+    async def server_error():
+        calls.append(1)
+        raise status_error(500)
+
+    with pytest.raises(UpstreamUnavailableError) as excinfo:
+        asyncio.run(resilience.call_llm("premium", 100, server_error))
+    assert len(calls) == 2
+    assert excinfo.value.retry_after >= 1.0
+
+
+def test_retry_after_headers_are_parsed():
+    assert resilience.retry_after_seconds(status_error(429, {"retry-after-ms": "1500"})) == 1.5
+    assert resilience.retry_after_seconds(status_error(429, {"retry-after": "7"})) == 7.0
+    date = email.utils.formatdate(time.time() + 60, usegmt=True)
+    assert 55 < resilience.retry_after_seconds(status_error(429, {"retry-after": date})) <= 60
+    assert resilience.retry_after_seconds(status_error(429, {"retry-after": "soon"})) is None
+    assert resilience.retry_after_seconds(status_error(429)) is None
+
+
+def test_backoff_delay_honours_retry_after():
+    assert resilience.backoff_delay(0, retry_after=5.0) >= 5.0
+    # Capped at llm_backoff_max
+    assert resilience.backoff_delay(0, retry_after=600.0) == settings.llm_backoff_max
+
+
+def test_shed_reservation_is_refunded(monkeypatch):
+    monkeypatch.setattr(settings, "llm_max_queue_wait_seconds", 1.0)
+    limiter = RateLimiter(requests_per_minute=6, tokens_per_minute=0)
+    for _ in range(6):
+        asyncio.run(limiter.acquire(100))
+    # The next request would wait ~10s for a token, longer than the queue allows
+    with pytest.raises(UpstreamUnavailableError) as excinfo:
+        asyncio.run(limiter.acquire(100))
+    assert excinfo.value.retry_after > 1.0
+    assert limiter.requests.tokens == pytest.approx(0.0, abs=0.01)
+
+
+def _half_open_guard():
+    guard = resilience.get_guard("premium")
+    guard.breaker.reset_seconds = 0
+    for _ in range(guard.breaker.failure_threshold):
+        guard.breaker.record_failure()
+    return guard
+
+
+async def _ok():
+    return "ok"
+
+
+def test_shed_probe_does_not_keep_breaker_half_open(monkeypatch):
+    monkeypatch.setattr(settings, "llm_max_queue_wait_seconds", 1.0)
+    guard = _half_open_guard()
+    guard.limiter = RateLimiter(requests_per_minute=6, tokens_per_minute=0)
+    guard.limiter.requests.tokens = -6
+    with pytest.raises(UpstreamUnavailableError):
+        asyncio.run(resilience.call_llm("premium", 100, _ok))
+    guard.limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=0)
+    assert asyncio.run(resilience.call_llm("premium", 100, _ok)) == "ok"
+    assert guard.breaker.state == "closed"
+
+
+def test_cancelled_probe_does_not_keep_breaker_half_open(monkeypatch):
+    guard = _half_open_guard()
+    guard.limiter = RateLimiter(requests_per_minute=6, tokens_per_minute=0)
+    guard.limiter.requests.tokens = -1
+
+    async def main():
+        # The probe waits ~10s in the limiter and is cancelled there, e.g. by a client disconnect
+        probe = asyncio.ensure_future(resilience.call_llm("premium", 100, _ok))
+        await asyncio.sleep(0.05)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        guard.limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=0)
+        return await resilience.call_llm("premium", 100, _ok)
+
+    assert asyncio.run(main()) == "ok"
+    assert guard.breaker.state == "closed"
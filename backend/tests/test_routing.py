@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from app.core import routing
+from app.core.config import settings
+from app.core.resilience import UpstreamUnavailableError
+from app.core.routing import Route, Target
+
+
+PREMIUM = Target(client=None, model="premium-model", tier="premium")
+FAST = Target(client=None, model="fast-model", tier="fast")
+ROUTE = Route(PREMIUM, FAST)
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats(monkeypatch):
+    monkeypatch.setattr(routing, "_stats", {})
+    monkeypatch.setattr(settings, "routing_hedge_after_seconds", 0.0)
+    monkeypatch.setattr(settings, "routing_premium_max_in_flight", 2)
+    monkeypatch.setattr(settings, "routing_premium_max_latency_seconds", 10.0)
+    monkeypatch.setattr(settings, "routing_stats_ttl_seconds", 120.0)
+
+
+def delays(**seconds):
+    # A fake LLM call that answers with its model name after the given delay per model
+    async def call(target):
+        delay = seconds.get(target.tier, 0.0)
+        if isinstance(delay, BaseException):
+            raise delay
+        await asyncio.sleep(delay)
+        return target.model
+
+    return call
+
+
+def test_saturated_premium_model_is_downgraded():
+    routing.model_stats(PREMIUM.model).in_flight = 2
+    assert routing.plan(ROUTE, 1000) == Route(FAST)
+    routing.model_stats(PREMIUM.model).in_flight = 1
+    assert routing.plan(ROUTE, 1000) == ROUTE
+
+
+def test_slow_premium_model_is_downgraded_until_its_stats_expire(monkeypatch):
+    routing.model_stats(PREMIUM.model).observe(30.0, 1000)
+    assert routing.downgrade_reason(PREMIUM.model, 1000) == "slow"
+    # Small calls are still predicted to be fast enough
+    assert routing.downgrade_reason(PREMIUM.model, 100) is None
+    monkeypatch.setattr(settings, "routing_stats_ttl_seconds", 0.0)
+    assert routing.plan(ROUTE, 1000) == ROUTE
+
+
+def test_unavailable_premium_model_falls_back():
+    call = delays(premium=UpstreamUnavailableError("circuit open"))
+    result, target = asyncio.run(routing.run_routed(ROUTE, 1000, call))
+    assert (result, target) == (FAST.model, FAST)
+
+
+def test_unavailable_model_without_fallback_raises():
+    call = delays(premium=UpstreamUnavailableError("circuit open"))
+    with pytest.raises(UpstreamUnavailableError):
+        asyncio.run(routing.run_routed(Route(PREMIUM), 1000, call))
+
+
+def test_fast_primary_is_not_hedged(monkeypatch):
+    monkeypatch.setattr(settings, "routing_hedge_after_seconds", 0.2)
+    calls = []
+
+    async def call(target):
+        calls.append(target.tier)
+        return target.model
+
+    assert asyncio.run(routing.run_routed(ROUTE, 1000, call)) == (PREMIUM.model, PREMIUM)
+    assert calls == ["premium"]
+
+
+def test_slow_primary_is_hedged_and_records_its_latency(monkeypatch):
+    monkeypatch.setattr(settings, "routing_hedge_after_seconds", 0.05)
+    result, target = asyncio.run(routing.run_routed(ROUTE, 1000, delays(premium=1.0, fast=0.05)))
+    assert (result, target) == (FAST.model, FAST)
+    premium = routing.model_stats(PREMIUM.model)
+    assert premium.in_flight == 0
+    # The cancelled loser had no estimate yet; its time until cancellation is recorded as a lower bound
+    assert premium.seconds_per_1k_tokens == pytest.approx(0.1, abs=0.05)
+
+
+def test_hedge_loser_below_estimate_is_not_recorded(monkeypatch):
+    monkeypatch.setattr(settings, "routing_hedge_after_seconds", 0.05)
+    routing.model_stats(PREMIUM.model).observe(5.0, 1000)
+    asyncio.run(routing.run_routed(ROUTE, 1000, delays(premium=1.0, fast=0.05)))
+    assert routing.model_stats(PREMIUM.model).seconds_per_1k_tokens == 5.0
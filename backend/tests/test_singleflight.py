@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_upstream_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", fetch) for _ in range(3)))
+
+    assert asyncio.run(main()) == ["result"] * 3
+    assert len(calls) == 1
+    assert flight.coalesced == 2
+    assert flight.in_flight() == 0
+
+
+def test_cancelling_one_waiter_keeps_the_call_for_the_others():
+    flight = SingleFlight()
+    upstream_cancelled = []
+
+    async def fetch():
+        try:
+            await asyncio.sleep(0.1)
+        except asyncio.CancelledError:
+            upstream_cancelled.append(1)
+            raise
+        return "result"
+
+    async def main():
+        first = asyncio.ensure_future(flight.do("key", fetch))
+        second = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "result"
+    assert upstream_cancelled == []
+
+
+def test_cancelling_every_waiter_cancels_the_call_and_the_next_starts_fresh():
+    flight = SingleFlight()
+    started = []
+    upstream_cancelled = []
+
+    async def fetch():
+        started.append(1)
+        try:
+            await asyncio.sleep(0.1)
+        except asyncio.CancelledError:
+            upstream_cancelled.append(1)
+            raise
+        return len(started)
+
+    async def main():
+        waiters = [asyncio.ensure_future(flight.do("key", fetch)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        assert flight.in_flight() == 0
+        return await flight.do("key", fetch)
+
+    assert asyncio.run(main()) == 2
+    assert upstream_cancelled == [1]